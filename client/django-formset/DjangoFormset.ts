@@ -1694,10 +1694,11 @@ class DjangoFormCollectionTemplate {
 	private readonly formset: DjangoFormset;
 	private readonly element: HTMLTemplateElement;
 	private readonly parent?: DjangoFormCollection;
-	private readonly renderEmptyCollection: Function;
+	private renderEmptyCollection: Function = template('');
 	private readonly addButton?: HTMLButtonElement;
-	private readonly maxSiblings: number|null = null;
+	private maxSiblings: number|null = null;
 	private readonly baseContext = new Map<string, string>();
+	private static readonly siblingTemplates = new Map<string, Promise<string>>();
 	public readonly prefix: string;
 	public markedForRemoval = false;
 
@@ -1705,25 +1706,19 @@ class DjangoFormCollectionTemplate {
 		this.formset = formset;
 		this.element = element;
 		this.parent = parent;
-		const matches = element.innerHTML.matchAll(/\$\{([^} ]+)}/g);
-		for (const match of matches) {
-			this.baseContext.set(match[1], match[0]);
+		if (element.hasAttribute('shared-template')) {
+			this.expandSharedTemplate();
 		}
 		const prefix = element.getAttribute('prefix');
 		if (!prefix)
 			throw new Error('<template class="empty-collection" ...> requires attribute "prefix"');
 		this.prefix = prefix;
 		formset.pushTemplatePrefix(this.prefix);
-		this.renderEmptyCollection = template(element.innerHTML);
+		this.compileTemplate();
 		if (element.nextElementSibling?.matches('button.add-collection')) {
 			this.addButton = element.nextElementSibling as HTMLButtonElement;
 			this.addButton.addEventListener('click', this.appendFormCollectionSibling);
 		}
-		const innerCollection = this.element.content.querySelector('django-form-collection');
-		const maxSiblings = innerCollection?.getAttribute('max-siblings');
-		if (maxSiblings) {
-			this.maxSiblings = parseInt(maxSiblings);
-		}
 		if (element.hasAttribute('sortable')) {
 			new Sortable(element.parentElement!, {
 				animation: 150,
@@ -1736,6 +1731,70 @@ class DjangoFormCollectionTemplate {
 		}
 	}
 
+	private compileTemplate() {
+		this.baseContext.clear();
+		const matches = this.element.innerHTML.matchAll(/\$\{([^} ]+)}/g);
+		for (const match of matches) {
+			this.baseContext.set(match[1], match[0]);
+		}
+		this.renderEmptyCollection = template(this.element.innerHTML);
+		const innerCollection = this.element.content.querySelector('django-form-collection');
+		const maxSiblings = innerCollection?.getAttribute('max-siblings') ?? this.element.getAttribute('max-siblings');
+		if (maxSiblings) {
+			this.maxSiblings = parseInt(maxSiblings);
+		}
+	}
+
+	private async fetchSiblingTemplate() {
+		// the template of collections declared with `lazy_siblings` is fetched on demand, once per path
+		const query = new URLSearchParams({sibling: this.prefix});
+		const url = `${this.formset.endpoint}?${query.toString()}`;
+		const siblingTemplates = DjangoFormCollectionTemplate.siblingTemplates;
+		if (!siblingTemplates.has(url)) {
+			const headers = new Headers();
+			headers.append('Accept', 'text/html');
+			siblingTemplates.set(url, fetch(url, {headers}).then(response => {
+				if (response.status !== 200)
+					throw new Error(`Unable to fetch template for extra siblings of '${this.prefix}': ${response.status}`);
+				return response.text();
+			}));
+		}
+		const collectionElement = document.createElement('template');
+		try {
+			collectionElement.innerHTML = await siblingTemplates.get(url)!;
+		} catch (error) {
+			siblingTemplates.delete(url);
+			throw error;
+		}
+		const emptyCollection = collectionElement.content.querySelector('.collection-siblings > template.empty-collection');
+		if (!(emptyCollection instanceof HTMLTemplateElement))
+			throw new Error(`Response for '${url}' does not contain <template class="empty-collection">.`);
+		this.element.innerHTML = emptyCollection.innerHTML;
+		this.element.removeAttribute('lazy-sibling');
+		this.compileTemplate();
+	}
+
+	private expandSharedTemplate() {
+		// templates shared amongst nested siblings are rendered only once, using placeholders for the parent positions
+		const sharedTemplateId = this.element.getAttribute('shared-template')!;
+		const sharedTemplate = this.formset.findSharedTemplate(sharedTemplateId);
+		const emptyCollection = sharedTemplate?.content.querySelector('.collection-siblings > template.empty-collection');
+		if (!sharedTemplate || !(emptyCollection instanceof HTMLTemplateElement))
+			throw new Error(`Missing <template id="${sharedTemplateId}" class="shared-collection">.`);
+		const context = new Map<string, string>();
+		for (const match of emptyCollection.innerHTML.matchAll(/\$\{([^} ]+)}/g)) {
+			context.set(match[1], match[0]);
+		}
+		const prefixParts = this.element.getAttribute('prefix')?.split('.') ?? [];
+		sharedTemplate.getAttribute('prefix')?.split('.').forEach((part, index) => {
+			const match = part.match(/^\$\{(parent_\d+)}$/);
+			if (match) {
+				context.set(match[1], prefixParts[index]);
+			}
+		});
+		this.element.innerHTML = template(emptyCollection.innerHTML)(Object.fromEntries(context));
+	}
+
 	private resortSiblings = (event: SortableEvent) => {
 		const oldIndex = event.oldDraggableIndex ?? NaN;
 		const newIndex = event.newDraggableIndex ?? NaN;
@@ -1752,7 +1811,14 @@ class DjangoFormCollectionTemplate {
 		}
 	};
 
-	private appendFormCollectionSibling = () => {
+	private appendFormCollectionSibling = async () => {
+		if (this.element.hasAttribute('lazy-sibling')) {
+			await this.fetchSiblingTemplate();
+		}
+		if (!this.parent) {
+			// an extra sibling must be positioned after the siblings not loaded yet
+			await this.formset.loadAllSiblings();
+		}
 		const context = Object.fromEntries(this.baseContext);
 		const [position, siblingId] = this.getNextPositionAndSiblingId();
 		context['position'] = position.toString();
@@ -1836,6 +1902,7 @@ export class DjangoFormset {
 	public readonly showFeedbackMessages: boolean;
 	private readonly abortController = new AbortController;
 	private readonly emptyCollectionPrefixes = Array<string>(0);
+	private loadSiblingsButton: HTMLButtonElement|null = null;
 	private data = {};
 
 	constructor(formset: DjangoFormsetElement) {
@@ -1852,6 +1919,7 @@ export class DjangoFormset {
 		this.assignFieldsToForms();
 		this.assignFormsToCollections();
 		this.findDetachedButtons();
+		this.findLoadSiblingsButton(this.element.querySelector('.collection-siblings'));
 		this.formCollections.forEach(collection => collection.markAsFreshAndEmpty());
 		window.setTimeout(() => this.validate(), 0);
 	}
@@ -1890,6 +1958,70 @@ export class DjangoFormset {
 		return showFeedbackMessages;
 	}
 
+	private findLoadSiblingsButton(siblingsElement?: Element|null) {
+		// collections declared with `siblings_window` render a button to load their next window of siblings
+		const button = siblingsElement?.querySelector(':scope > button.load-siblings');
+		if (button instanceof HTMLButtonElement) {
+			this.loadSiblingsButton = button;
+			this.loadSiblingsButton.addEventListener('click', this.loadNextSiblings);
+		}
+	}
+
+	private loadNextSiblings = () => {
+		this.loadSiblings();
+	};
+
+	public async loadSiblings() : Promise<boolean> {
+		const button = this.loadSiblingsButton;
+		if (!button)
+			return false;
+		this.loadSiblingsButton = null;
+		button.removeEventListener('click', this.loadNextSiblings);
+		button.disabled = true;
+		const query = new URLSearchParams({siblings_offset: button.getAttribute('offset') ?? ''});
+		const headers = new Headers();
+		headers.append('Accept', 'text/html');
+		const response = await fetch(`${this.endpoint}?${query.toString()}`, {headers});
+		if (response.status !== 200) {
+			console.warn(`Unknown response status: ${response.status}`);
+			button.disabled = false;
+			this.findLoadSiblingsButton(button.parentElement);
+			return false;
+		}
+		const responseElement = document.createElement('template');
+		responseElement.innerHTML = await response.text();
+		// the response contains just the siblings of the next window, followed by the button to load the window after
+		const newElements = Array.from(responseElement.content.children);
+		const parentElement = button.parentElement;
+		button.replaceWith(...newElements);
+		const newSiblings = Array<DjangoFormCollectionSibling>(0);
+		for (const element of newElements) {
+			if (element instanceof HTMLElement && element.matches('django-form-collection[sibling-position]')) {
+				const siblingId = parseInt(element.getAttribute('sibling-position')!);
+				newSiblings.push(new DjangoFormCollectionSibling(this, element, siblingId));
+				this.findForms(element);
+				this.assignFieldsToForms(element);
+			}
+		}
+		this.formCollections.push(...newSiblings);
+		this.assignFormsToCollections();
+		this.findCollectionErrorsList();
+		this.findLoadSiblingsButton(parentElement);
+		newSiblings.forEach(sibling => sibling.markAsFreshAndEmpty());
+		this.formCollections.forEach(collection => collection.updateRemoveButtonAttrs());
+		this.formCollectionTemplate?.updateAddButtonAttrs();
+		this.validate();
+		return true;
+	}
+
+	public async loadAllSiblings() {
+		while (await this.loadSiblings());
+	}
+
+	public findSharedTemplate(templateId: string) : HTMLTemplateElement|null {
+		return this.element.querySelector(`template.shared-collection[id="${CSS.escape(templateId)}"]`);
+	}
+
 	public pushTemplatePrefix(prefix: string) {
 		this.emptyCollectionPrefixes.push(prefix);
 	}
@@ -2122,6 +2254,10 @@ export class DjangoFormset {
 				throw new Error("<django-formset> requires attribute 'endpoint=\"server endpoint\"' for submission");
 			this.removeFreshCollections();
 			const body = this.buildBody(extraData);
+			if (this.loadSiblingsButton) {
+				// siblings of windows not loaded yet are unchanged, hence they are neither validated nor submitted
+				Object.assign(body, {siblings_offset: parseInt(this.loadSiblingsButton.getAttribute('offset') ?? '')});
+			}
 			try {
 				const headers = new Headers();
 				headers.append('Accept', 'application/json');
@@ -336,15 +336,14 @@ export class DjangoSelectize extends IncompleteSelect {
 
 		if (isFinite(value)) {
 			// if the value is a number, enforce re-fetching object from the server
-			this.loadOptions(this.buildFetchQuery(0, {pk: value.toString()}), (options: Array<OptionData>) => {
-				if (this.tomSelect.getValue() === value.toString()) {
+			this.lookupOption(value.toString()).then((option?: OptionData) => {
+				if (option && this.tomSelect.getValue() === value.toString()) {
 					// object already loaded by tom-select
-					this.tomSelect.updateOption(value.toString(), options[0]);
-				} else {
+					this.tomSelect.updateOption(value.toString(), option);
+				} else if (option) {
 					// object must be added to tom-select
-					this.tomSelect.addOptions(options);
+					this.tomSelect.addOption(option);
 				}
-			}).then(() => {
 				this.tomSelect.setValue(value.toString(), true);
 				emitChangeEvent();
 			});
@@ -6,6 +6,9 @@ export abstract class IncompleteSelect extends Widget {
 	protected isIncomplete: boolean;
 	protected getValue = () => [] as string|string[];
 	private filterByValues = new Map<string, string | string[]>();
+	private nextCursor: {signature: string, cursor: string} | null = null;
+	private pendingLookups = new Map<string, Array<(option?: any) => void>>();
+	private static pendingFetches = new Map<string, Array<{fieldName: string, query: URLSearchParams, resolve: Function}>>();
 
 	constructor(element: HTMLSelectElement) {
 		super(element);
@@ -54,7 +57,6 @@ export abstract class IncompleteSelect extends Widget {
 
 	protected buildFetchQuery(offset: number, q?: {pk?: string, search?: string}) : URLSearchParams {
 		const query = new URLSearchParams();
-		query.set('offset', String(offset));
 		if (q?.pk) {
 			query.set('pk', q.pk);
 		} else if (q?.search) {
@@ -71,25 +73,108 @@ export abstract class IncompleteSelect extends Widget {
 				}
 			}
 		}
+		if (offset > 0 && this.nextCursor?.signature === this.querySignature(query)) {
+			// continue keyset pagination from where the previous response of the same query stopped
+			query.set('cursor', this.nextCursor.cursor);
+		}
+		query.set('offset', String(offset));
 		return query;
 	}
 
+	private querySignature(query: URLSearchParams) : string {
+		const signature = new URLSearchParams(query);
+		['offset', 'cursor', 'field'].forEach(key => signature.delete(key));
+		return signature.toString();
+	}
+
+	protected lookupOption(pk: string) : Promise<any> {
+		// lookups requested during the same tick are coalesced into one request
+		return new Promise(resolve => {
+			if (this.pendingLookups.size === 0) {
+				queueMicrotask(() => this.flushLookups());
+			}
+			this.pendingLookups.set(pk, [...this.pendingLookups.get(pk) ?? [], resolve]);
+		});
+	}
+
+	private async flushLookups() {
+		const lookups = this.pendingLookups;
+		this.pendingLookups = new Map();
+		let options: Array<any> = [];
+		try {
+			const query = this.buildFetchQuery(0);
+			lookups.forEach((_, pk) => query.append('pk', pk));
+			await this.loadOptions(query, (data: Array<any>) => options = data);
+		} finally {
+			lookups.forEach((resolvers, pk) => {
+				const option = options.find(o => String(o.id) === pk);
+				resolvers.forEach(resolve => resolve(option));
+			});
+		}
+	}
+
 	protected async loadOptions(query: URLSearchParams, successCallback: Function) {
-		const headers = new Headers();
-		headers.append('Accept', 'application/json');
 		query.set('field', this.fieldName!);
-		const response = await fetch(`${this.endpoint}?${query.toString()}`, {
-			method: 'GET',
-			headers: headers,
-		});
-		if (response.status === 200) {
-			const data = await response.json();
+		const data = await IncompleteSelect.fetchOptions(this.endpoint!, this.fieldName, query);
+		if (data) {
 			if (typeof data.incomplete === 'boolean') {
 				this.isIncomplete = data.incomplete;
 			}
+			if (typeof data.next_cursor === 'string') {
+				this.nextCursor = {signature: this.querySignature(query), cursor: data.next_cursor};
+			} else if (data.next_cursor === null) {
+				this.nextCursor = null;
+			}
 			successCallback(data.options);
-		} else {
-			console.error(`Failed to fetch from ${this.endpoint} (status=${response.status})`);
+		}
+	}
+
+	private static fetchOptions(endpoint: string, fieldName: string, query: URLSearchParams) : Promise<any> {
+		// fetches of selects initialized during the same tick are gathered into one request
+		return new Promise(resolve => {
+			let pending = IncompleteSelect.pendingFetches.get(endpoint);
+			if (!pending) {
+				IncompleteSelect.pendingFetches.set(endpoint, pending = []);
+				setTimeout(() => IncompleteSelect.flushFetches(endpoint));
+			}
+			pending.push({fieldName, query, resolve});
+		});
+	}
+
+	private static async flushFetches(endpoint: string) {
+		const pending = IncompleteSelect.pendingFetches.get(endpoint) ?? [];
+		IncompleteSelect.pendingFetches.delete(endpoint);
+		if (new Set(pending.map(p => p.fieldName)).size < Math.max(pending.length, 2)) {
+			// nothing to gather or repeated fetches for the same field
+			pending.forEach(async p => p.resolve(await IncompleteSelect.fetchJson(endpoint, p.query)));
+			return;
+		}
+		const query = new URLSearchParams();
+		pending.forEach(p => {
+			query.append('field', p.fieldName);
+			p.query.forEach((value, key) => {
+				if (key !== 'field') {
+					query.append(`${p.fieldName}:${key}`, value);
+				}
+			});
+		});
+		const data = await IncompleteSelect.fetchJson(endpoint, query);
+		pending.forEach(p => p.resolve(data?.[p.fieldName]));
+	}
+
+	private static async fetchJson(endpoint: string, query: URLSearchParams) {
+		const headers = new Headers();
+		headers.append('Accept', 'application/json');
+		try {
+			const response = await fetch(`${endpoint}?${query.toString()}`, {
+				method: 'GET',
+				headers: headers,
+			});
+			if (response.status === 200)
+				return await response.json();
+			console.error(`Failed to fetch from ${endpoint} (status=${response.status})`);
+		} catch (error) {
+			console.error(`Failed to fetch from ${endpoint}: ${error}`);
 		}
 	}
 }
@@ -1,16 +1,36 @@
+from contextlib import nullcontext
+from weakref import WeakKeyDictionary
+
 from django.core import validators
 from django.core.exceptions import ImproperlyConfigured
 from django.db.models.fields.files import FieldFile
 from django.forms import boundfield
 from django.forms.fields import FileField, JSONField
+from django.forms.models import ModelChoiceIterator
 from django.utils.functional import cached_property
+from django.utils.translation import get_language
 from django.utils.translation import gettext_lazy as _
 
+from formset.choices import CachedModelChoiceIterator
 from formset.fields import Activator, FileFieldMixin
 from formset.renderers import ClassList
 from formset.upload import get_file_info
+from formset.utils import mixin_class
 from formset.widgets import UploadedFileInput
 
+_static_metadata = WeakKeyDictionary()
+
+
+def clear_static_metadata(field=None):
+    """
+    Discard the metadata shared by the bound fields of the given field, or of all fields if omitted.
+    Call it after mutating a field which already has been rendered.
+    """
+    if field is None:
+        _static_metadata.clear()
+    else:
+        _static_metadata.pop(field, None)
+
 
 class CheckboxInputMixin:
     """
@@ -27,19 +47,30 @@ class BoundField(boundfield.BoundField):
     def __init__(self, form, field, name):
         if isinstance(field, FileField) and not isinstance(field, FileFieldMixin):
             # Fields of type ``FileField`` require a modified ``clean()``-method to handle Path objects
-            field.__class__ = type(field.__class__.__name__, (FileFieldMixin, field.__class__), {})
+            field.__class__ = mixin_class(FileFieldMixin, field.__class__)
         super().__init__(form, field, name)
 
     @property
     def errors(self):
         errors = self.form.errors.get(self.name, self.form.error_class())
-        errors.client_messages = self._get_client_messages()
+        if self._has_callable_limits():
+            errors.client_messages = self._get_client_messages()
+        else:
+            errors.client_messages = self._get_static_metadata('client_messages', self._get_client_messages)
         return errors
 
     def as_widget(self, widget=None, attrs=None, only_initial=False):
         widget = widget or self.field.widget
+        choice_cache = getattr(self.form, 'choice_cache', None)
+        if choice_cache and type(getattr(widget, 'choices', None)) is ModelChoiceIterator:
+            widget.choices.__class__ = CachedModelChoiceIterator
+        with choice_cache.activate() if choice_cache else nullcontext():
+            return self._as_widget(widget, attrs, only_initial)
+
+    def _as_widget(self, widget, attrs, only_initial):
         if self.widget_type == 'checkbox' and not isinstance(widget, CheckboxInputMixin):
-            widget.__class__ = type(widget.__class__.__name__, (CheckboxInputMixin, widget.__class__), {'label': self.label})
+            widget.__class__ = mixin_class(CheckboxInputMixin, widget.__class__)
+            widget.label = self.label
         if self.field.localize:
             widget.is_localized = True
         attrs = attrs or {}
@@ -65,6 +96,11 @@ class BoundField(boundfield.BoundField):
         attrs = super().build_widget_attrs(attrs, widget)
         if hasattr(self.form, 'form_id'):
             attrs['form'] = self.form.form_id
+        attrs.update(self._get_static_metadata('widget_attrs', self._get_static_widget_attrs))
+        return attrs
+
+    def _get_static_widget_attrs(self):
+        attrs = {}
         if hasattr(self.field, 'regex'):
             attrs['pattern'] = self.field.regex.pattern
         if isinstance(self.field, JSONField):
@@ -79,26 +115,56 @@ class BoundField(boundfield.BoundField):
         Return a string of space-separated CSS classes for this field.
         """
         extra_classes = ClassList(extra_classes)
+        field_css_classes = getattr(self.form.renderer, 'field_css_classes', None)
+        if isinstance(field_css_classes, dict):
+            field_css_classes = field_css_classes.get(self.name, field_css_classes.get('*'))
+        if isinstance(field_css_classes, (list, set, tuple)):
+            field_css_classes = ' '.join(sorted(field_css_classes))
+        extra_classes.update(self._get_static_metadata(
+            ('css_classes', field_css_classes),
+            lambda: self._get_static_css_classes(field_css_classes),
+        ))
+        return super().css_classes(extra_classes)
+
+    def _get_static_css_classes(self, field_css_classes):
+        extra_classes = ClassList()
         if self.field.required:
             if self.widget_type == 'checkboxselectmultiple':
                 extra_classes.add('dj-required-any')
             else:
                 extra_classes.add('dj-required')
-
         # field_css_classes is an optional member of a FormRenderer optimized for django-formset
-        field_css_classes = getattr(self.form.renderer, 'field_css_classes', None)
-        if isinstance(field_css_classes, dict):
-            try:
-                extra_classes.add(field_css_classes[self.name])
-            except KeyError:
-                extra_classes.add(field_css_classes.get('*'))
-        else:
-            extra_classes.add(field_css_classes)
-        return super().css_classes(extra_classes)
+        extra_classes.add(field_css_classes)
+        return extra_classes
 
     @cached_property
     def widget_type(self):
-        return super().widget_type
+        return self._get_static_metadata('widget_type', lambda: boundfield.BoundField.widget_type.fget(self))
+
+    def _get_static_metadata(self, key, compute):
+        """
+        Return the metadata computed by ``compute()``, which must depend only on the field definition,
+        its name, the renderer class and the active language. It is computed once and then shared by all
+        bound fields of that field, for instance those of the siblings in a FormCollection. Fields
+        modified after having been rendered must therefore be replaced, or their metadata must be
+        discarded using :func:`clear_static_metadata`.
+        """
+        key = key, self.name, type(self.form.renderer), get_language()
+        try:
+            metadata = _static_metadata.setdefault(self.field, {})
+        except TypeError:
+            # field is not hashable
+            return compute()
+        try:
+            return metadata[key]
+        except KeyError:
+            value = metadata[key] = compute()
+            return value
+
+    def _has_callable_limits(self):
+        limits = [getattr(self.field, 'min_value', None), getattr(self.field, 'max_value', None)]
+        limits.extend(self.field.widget.attrs.get(attr) for attr in ['min', 'max'])
+        return any(callable(limit) for limit in limits)
 
     @cached_property
     def auto_id(self):
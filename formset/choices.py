@@ -0,0 +1,297 @@
+import copy
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.forms.fields import Field
+from django.forms.models import ModelChoiceIterator
+
+_active_choice_cache = ContextVar('active_choice_cache', default=None)
+
+
+class ChoiceCache:
+    """
+    Cache for the evaluated querysets of choice fields. One instance of this class is shared by
+    all replicas of forms and sub-collections belonging to the same FormCollection. Querysets
+    compiling to the same SQL statement and parameters therefore are evaluated only once while
+    rendering that collection, rather than once per sibling.
+    """
+    def __init__(self):
+        self._objects = {}
+        self._counts = {}
+        self._choices = {}
+        self._keys = {}
+
+    @staticmethod
+    def get_key(queryset):
+        try:
+            sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+        except EmptyResultSet:
+            return
+        return queryset.db, sql, str(params)
+
+    def fetch(self, queryset, limit=None):
+        """
+        Return the objects of the given queryset as list. If ``limit`` is given, only the first
+        ``limit`` objects are fetched and cached.
+        """
+        if (key := self.get_key(queryset)) is None:
+            return []
+        fetched = self._objects.setdefault(key, {})  # maps limits onto the objects fetched up to them
+        if limit not in fetched:
+            for fetched_limit, objects in fetched.items():
+                if limit is not None and (fetched_limit is None or fetched_limit > limit):
+                    return objects[:limit]
+            fetched[limit] = list(queryset[:limit])
+        return fetched[limit]
+
+    def count(self, queryset):
+        """
+        Return the number of objects in the given queryset.
+        """
+        if (key := self.get_key(queryset)) is None:
+            return 0
+        if None in self._objects.get(key, {}):
+            return len(self._objects[key][None])
+        if key not in self._counts:
+            self._counts[key] = queryset.count()
+        return self._counts[key]
+
+    def prime(self, field, values):
+        """
+        Resolve the values submitted for a model choice field by many siblings using one query, so
+        that cleaning that field in each sibling just has to look up its chosen objects.
+        """
+        if (choices := self._get_choices(field)) is None:
+            return
+        to_field = self._get_to_field(field)
+        missing = set()
+        for value in values:
+            try:
+                value = to_field.to_python(value)
+            except (TypeError, ValueError, ValidationError):
+                continue  # will be rejected while cleaning the field
+            if value is not None and str(value) not in choices and '\x00' not in str(value):
+                missing.add(value)
+        if missing:
+            for obj in field.queryset.filter(**{f'{field.to_field_name or "pk"}__in': missing}):
+                choices[str(getattr(obj, field.to_field_name or 'pk'))] = obj
+
+    def lookup(self, field, values):
+        """
+        Return the list of objects primed for the given values of a model choice field, or ``None``
+        if any of them has not been primed.
+        """
+        if (choices := self._get_choices(field)) is None:
+            return
+        try:
+            return [choices[str(value)] for value in values]
+        except (KeyError, TypeError):
+            return
+
+    def _get_choices(self, field):
+        queryset = field.queryset
+        queryset_key = self._keys.get(id(queryset))
+        if queryset_key is None or queryset_key[0] is not queryset:
+            # keep a reference onto the queryset, so that its id can't be reused
+            queryset_key = self._keys[id(queryset)] = queryset, self.get_key(queryset)
+        if queryset_key[1] is None:
+            return
+        return self._choices.setdefault((queryset_key[1], field.to_field_name), {})
+
+    @staticmethod
+    def _get_to_field(field):
+        opts = field.queryset.model._meta
+        return opts.get_field(field.to_field_name) if field.to_field_name else opts.pk
+
+    def clear(self):
+        self._objects.clear()
+        self._counts.clear()
+        self._choices.clear()
+        self._keys.clear()
+
+    @contextmanager
+    def activate(self):
+        """
+        Use this cache for all querysets evaluated through a choice iterator inside this context.
+        """
+        token = _active_choice_cache.set(self)
+        try:
+            yield self
+        finally:
+            _active_choice_cache.reset(token)
+
+
+def iterate_queryset(queryset, limit=None):
+    if choice_cache := _active_choice_cache.get():
+        return choice_cache.fetch(queryset, limit)
+    if limit is not None:
+        queryset = queryset[:limit]
+    # Can't use iterator() when queryset uses prefetch_related()
+    if not queryset._prefetch_related_lookups:
+        return queryset.iterator()
+    return queryset
+
+
+def count_queryset(queryset):
+    if choice_cache := _active_choice_cache.get():
+        return choice_cache.count(queryset)
+    return queryset.count()
+
+
+class CachedModelChoiceIterator(ModelChoiceIterator):
+    """
+    Replacement for Django's ``ModelChoiceIterator`` which evaluates its queryset through the
+    currently active :class:`ChoiceCache`.
+    """
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in iterate_queryset(self.queryset):
+            yield self.choice(obj)
+
+    def __len__(self):
+        return count_queryset(self.queryset) + (1 if self.field.empty_label is not None else 0)
+
+
+class CachedModelChoiceFieldMixin:
+    """
+    Mixin for a ``ModelChoiceField``, which looks up the chosen object in the currently active
+    :class:`ChoiceCache` instead of querying it, if that object has been primed.
+    """
+    def to_python(self, value):
+        if (choice_cache := _active_choice_cache.get()) and value not in self.empty_values:
+            try:
+                value = self._get_to_field(self).to_python(value)
+            except (TypeError, ValueError, ValidationError):
+                pass
+            else:
+                if objects := choice_cache.lookup(self, [value]):
+                    return objects[0]
+        return super().to_python(value)
+
+    _get_to_field = staticmethod(ChoiceCache._get_to_field)
+
+
+class CachedModelMultipleChoiceFieldMixin:
+    """
+    Mixin for a ``ModelMultipleChoiceField``, which looks up the chosen objects in the currently
+    active :class:`ChoiceCache` instead of querying them, if all of them have been primed.
+    """
+    def _check_values(self, value):
+        if (choice_cache := _active_choice_cache.get()) and isinstance(value, (list, tuple)):
+            values = list(dict.fromkeys(str(val) for val in value))
+            if (objects := choice_cache.lookup(self, values)) is not None:
+                queryset = self.queryset.filter(**{f'{self.to_field_name or "pk"}__in': values})
+                # the same objects would be returned by evaluating this queryset
+                queryset._result_cache = objects
+                queryset._prefetch_done = True
+                return queryset
+        return super()._check_values(value)
+
+
+class ChoiceSource:
+    """
+    Choices for the widgets :class:`formset.widgets.Selectize`, :class:`formset.widgets.SelectizeMultiple`
+    and :class:`formset.widgets.DualSelector` which do not originate from a Django QuerySet. Pass an
+    instance of this class as ``choices`` to a :class:`formset.fields.ChoiceField` or
+    :class:`formset.fields.MultipleChoiceField`.
+
+    The default implementation operates on the list of choices given as iterable or callable returning
+    an iterable of ``(value, label)`` tuples. Sources backed by a remote catalogue or a large file shall
+    override the hooks :meth:`count`, :meth:`slice`, :meth:`search`, :meth:`filter` and :meth:`lookup`
+    to push pagination and searching down, instead of materializing all choices.
+    """
+    choices = ()
+
+    def __init__(self, choices=()):
+        self.choices = choices
+
+    def __call__(self):
+        return self.get_choices()
+
+    def get_choices(self):
+        return list(self.choices() if callable(self.choices) else self.choices)
+
+    def evaluate(self):
+        """
+        Return this source operating on its choices as evaluated right now. A callable providing
+        the choices therefore is invoked only once while handling a request, rather than by each of
+        the hooks below.
+        """
+        if not callable(self.choices):
+            return self
+        choice_source = copy.copy(self)
+        choice_source.choices = self.get_choices()
+        return choice_source
+
+    def count(self):
+        """
+        Return the number of choices in this source.
+        """
+        return len(self.get_choices())
+
+    def slice(self, offset, limit):
+        """
+        Return a list of at most ``limit`` choices starting at ``offset``.
+        """
+        return self.get_choices()[offset:offset + limit]
+
+    def search(self, term):
+        """
+        Return a source narrowed to the choices matching the given search term.
+        """
+        term = term.casefold()
+        return ChoiceSource([choice for choice in self.get_choices() if term in str(choice[1]).casefold()])
+
+    def filter(self, **filters):
+        """
+        Return a source narrowed to the choices matching the given filters. Each filter maps the lookup
+        declared by the widget's ``filter_by`` argument onto a list of values. The default
+        implementation can not interpret these lookups and hence returns the unfiltered source.
+        """
+        return self
+
+    def lookup(self, values):
+        """
+        Return the choices for the given list of values.
+        """
+        values = set(str(value) for value in values)
+        return [choice for choice in self.get_choices() if str(choice[0]) in values]
+
+
+def get_choice_source(choices):
+    """
+    Return the :class:`ChoiceSource` wrapped by the choices of a field or widget, if any.
+    """
+    # Django<5.0 names the wrapped callable `choices_func`
+    func = getattr(choices, 'func', getattr(choices, 'choices_func', None))
+    if isinstance(func, ChoiceSource):
+        return func
+
+
+class ChoiceSourceFieldMixin:
+    """
+    Mixin for a ``ChoiceField`` or ``MultipleChoiceField`` whose choices are provided by a
+    :class:`ChoiceSource`. It validates the submitted values by looking them up in that source,
+    rather than by iterating over all of its choices.
+    """
+    def validate(self, value):
+        if (choice_source := get_choice_source(self.choices)) is None:
+            return super().validate(value)
+        Field.validate(self, value)
+        values = [val for val in (value if isinstance(value, (list, tuple)) else [value]) if val]
+        if values:
+            valid_values = {str(val) for val, _ in choice_source.lookup(values)}
+            for val in values:
+                if str(val) not in valid_values:
+                    raise ValidationError(
+                        self.error_messages['invalid_choice'],
+                        code='invalid_choice',
+                        params={'value': val},
+                    )
+
+    def valid_value(self, value):
+        if (choice_source := get_choice_source(self.choices)) is None:
+            return super().valid_value(value)
+        return bool(choice_source.lookup([value]))
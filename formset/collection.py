@@ -1,24 +1,66 @@
 import operator
-from functools import reduce
+import re
+from collections.abc import Sequence
+from contextvars import ContextVar
+from functools import partial, reduce
+from hashlib import md5
+from itertools import chain
 
+from django.conf import settings
 from django.core import validators
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
 from django.core.exceptions import NON_FIELD_ERRORS
+from django.db import connections, transaction
 from django.db.utils import IntegrityError
 from django.forms.forms import BaseForm
-from django.forms.models import BaseModelForm, construct_instance, model_to_dict
+from django.forms.models import (BaseModelForm, ModelChoiceField, ModelMultipleChoiceField, construct_instance,
+                                 model_to_dict)
 from django.forms.utils import ErrorDict, ErrorList, RenderableMixin
 from django.forms.widgets import MediaDefiningClass
 from django.utils.datastructures import MultiValueDict
+from django.utils.functional import cached_property
+from django.utils.html import format_html_join
+from django.utils.safestring import mark_safe
 from django.utils.text import get_text_list
-from django.utils.translation import gettext_lazy
+from django.utils.translation import get_language, gettext_lazy
 
+from formset.choices import CachedModelChoiceFieldMixin, CachedModelMultipleChoiceFieldMixin, ChoiceCache
 from formset.exceptions import FormCollectionError
 from formset.fields import Activator
+from formset.renderers import ClassList
 from formset.renderers.default import FormRenderer
-from formset.utils import MARKED_FOR_REMOVAL, FormMixin, FormsetErrorList, HolderMixin, RenderableDetachedFieldMixin
+from formset.utils import (MARKED_FOR_REMOVAL, FormMixin, FormsetErrorList, HolderMixin, RenderableDetachedFieldMixin,
+                           mixin_class)
 
 COLLECTION_ERRORS = '_collection_errors_'
 
+_shared_templates = ContextVar('shared_templates', default=None)
+
+
+def split_parent_positions(prefix):
+    """
+    Replace the sibling positions of the parents contained in ``prefix`` by the placeholders
+    ``${parent_0}``, ``${parent_1}``, etc. Return that prefix pattern and the replaced positions.
+    """
+    parts, positions = [], []
+    for part in prefix.split('.'):
+        if part.isdigit():
+            parts.append(f'${{parent_{len(positions)}}}')
+            positions.append(part)
+        else:
+            parts.append(part)
+    return '.'.join(parts), positions
+
+
+def sorted_css_classes(css_classes):
+    """
+    Return the given CSS classes, or the mapping of field names onto CSS classes, in a stable order.
+    """
+    if isinstance(css_classes, dict):
+        return sorted((key, sorted_css_classes(value)) for key, value in css_classes.items())
+    return sorted(ClassList(css_classes))
+
 
 class FormCollectionMeta(MediaDefiningClass):
     """
@@ -32,18 +74,12 @@ class FormCollectionMeta(MediaDefiningClass):
                 attrs.pop(key)
                 setattr(value, '_name', key)
                 if isinstance(value, Activator) and not isinstance(value, RenderableDetachedFieldMixin):
-                    value.__class__ = type(
-                        value.__class__.__name__,
-                        (RenderableDetachedFieldMixin, value.__class__),
-                        {}
-                    )
+                    value.__class__ = mixin_class(RenderableDetachedFieldMixin, value.__class__)
                 if isinstance(value, BaseForm) and not isinstance(value, FormMixin):
-                    value.__class__ = type(
-                        value.__class__.__name__,
-                        (FormMixin, value.__class__),
-                        {}
-                    )
+                    value.__class__ = mixin_class(FormMixin, value.__class__)
                     value.error_class = FormsetErrorList
+                if isinstance(value, BaseForm):
+                    cls.add_choice_cache_mixins(value)
                 attrs['declared_holders'][key] = value
 
         new_class = super().__new__(cls, name, bases, attrs)
@@ -62,8 +98,289 @@ class FormCollectionMeta(MediaDefiningClass):
 
         new_class.declared_holders = declared_holders
 
+        # Flat index of all fields in this collection, so that `get_field()` doesn't have to walk the
+        # declared holders. Sibling positions in its field paths are replaced by an asterisk.
+        has_many = not (new_class.min_siblings is None and new_class.max_siblings is None
+                        and new_class.extra_siblings is None)
+        new_class.field_index = cls.build_field_index(declared_holders, has_many)
+
+        # Relations traversed by `model_to_dict()`, so that they can be prefetched for all objects at once.
+        if 'prefetch_lookups' not in attrs:
+            if new_class.model_to_dict is BaseFormCollection.model_to_dict:
+                new_class.prefetch_lookups = cls.build_prefetch_lookups(declared_holders)
+            else:
+                new_class.prefetch_lookups = []
+
         return new_class
 
+    @staticmethod
+    def add_choice_cache_mixins(form):
+        """
+        Let the model choice fields of a declared form look up their chosen objects in the choice
+        cache primed for all siblings. Since the fields of a declared form are shared by its siblings,
+        this is done once here rather than while validating.
+        """
+        for field in form.fields.values():
+            if isinstance(field, ModelMultipleChoiceField):
+                if not isinstance(field, CachedModelMultipleChoiceFieldMixin):
+                    field.__class__ = mixin_class(CachedModelMultipleChoiceFieldMixin, field.__class__)
+            elif isinstance(field, ModelChoiceField) and not isinstance(field, CachedModelChoiceFieldMixin):
+                field.__class__ = mixin_class(CachedModelChoiceFieldMixin, field.__class__)
+
+    @classmethod
+    def build_field_index(cls, holders, has_many):
+        field_index = {}
+        for name, holder in holders.items():
+            prefix = f'*.{name}' if has_many else name
+            if isinstance(holder, BaseFormCollection):
+                sub_index = cls.build_field_index(holder.declared_holders, holder.has_many)
+            elif isinstance(holder, BaseForm):
+                sub_index = holder.fields
+            else:
+                continue
+            for path, field in sub_index.items():
+                field_index[f'{prefix}.{path}'] = field
+        return field_index
+
+    @classmethod
+    def build_prefetch_lookups(cls, holders):
+        prefetch_lookups = []
+        for name, holder in holders.items():
+            if isinstance(holder, BaseFormCollection):
+                if holder.has_many:
+                    prefetch_lookups.append(name)
+                    if type(holder).models_to_list is BaseFormCollection.models_to_list:
+                        prefetch_lookups.extend(f'{name}__{lookup}' for lookup in holder.prefetch_lookups)
+                else:
+                    prefetch_lookups.extend(holder.prefetch_lookups)
+            elif isinstance(holder, BaseModelForm) and not callable(getattr(holder, 'model_to_dict', None)):
+                # `django.forms.models.model_to_dict()` queries the values of many-to-many fields
+                prefetch_lookups.extend(
+                    field.name for field in holder._meta.model._meta.many_to_many if field.name in holder.fields
+                )
+        return prefetch_lookups
+
+
+class CachedTemplateHolder:
+    """
+    Proxy for the empty holder rendered as template for extra siblings. Its markup does not depend
+    on the request data, therefore it is rendered only once and then looked up in the cache.
+    """
+    def __init__(self, holder, cache, key, timeout=DEFAULT_TIMEOUT, replicate_pattern=None, parent_positions=()):
+        self.holder = holder
+        self.cache = cache
+        self.key = key
+        self.timeout = timeout
+        # nested inside siblings, the template is cached with placeholders for the parent's positions
+        self.replicate_pattern = replicate_pattern
+        self.parent_positions = parent_positions
+
+    def __getattr__(self, name):
+        return getattr(self.holder, name)
+
+    def render(self):
+        html = self.cache.get(self.key)
+        if html is None:
+            template = self.replicate_pattern() if self.parent_positions else self.holder
+            html = str(template.render())
+            self.cache.set(self.key, html, self.timeout)
+        for level, position in enumerate(self.parent_positions):
+            html = html.replace(f'${{parent_{level}}}', position)
+        return mark_safe(html)
+
+    __str__ = render
+    __html__ = render
+
+
+class CollectionChunk:
+    """
+    Proxy for a collection, used to render a part of it. It iterates over the given holders only and
+    optionally omits the markup preceding and following the holders.
+    """
+    def __init__(self, collection, holders, omit_head=True, omit_tail=True):
+        self.collection = collection
+        self.holders = holders
+        self.omit_head = omit_head
+        self.omit_tail = omit_tail
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    def __iter__(self):
+        return iter(self.holders)
+
+
+class CollectionPlaceholder:
+    """
+    Stands in for a form collection while rendering its surroundings, so that the rendered markup
+    can be split where the collection belongs and the collection itself can be streamed.
+    """
+    def __init__(self, form_collection):
+        self.form_collection = form_collection
+        self.marker = f'<!--form-collection-{id(form_collection)}-->'
+
+    def __getattr__(self, name):
+        return getattr(self.form_collection, name)
+
+    def __str__(self):
+        return mark_safe(self.marker)
+
+
+class LazyModelsList(Sequence):
+    """
+    Initial data for a collection with siblings, which converts the objects of the given queryset
+    using ``collection.models_to_list()`` only for the slices actually accessed. Use it together
+    with ``siblings_window`` to avoid converting all objects when just one window is rendered.
+    An unordered queryset is ordered by primary key, because otherwise the database may return
+    overlapping windows.
+    """
+    def __init__(self, collection, queryset):
+        self.collection = collection
+        self.queryset = queryset if queryset.ordered else queryset.order_by('pk')
+        self._length = None
+
+    def __len__(self):
+        if self._length is None:
+            self._length = self.queryset.count()
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.collection.models_to_list(self.queryset[index])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("LazyModelsList index out of range")
+        return self.collection.models_to_list(self.queryset[index:index + 1])[0]
+
+
+def bulk_save_model_forms(model, entries):
+    """
+    Save the objects of the given model forms using one bulk query per kind of operation. Each entry
+    is a tuple of a model form, the name of the field relating its object to the parent object, and
+    that parent object. Objects of forms marked for removal are deleted, objects of new forms are
+    created and objects of changed forms are updated. If one of these bulk queries fails, the objects
+    are saved form by form, so that errors can be assigned to the offending form.
+    """
+    manager = model._default_manager
+    removed_holders, created_holders, updated_holders, update_fields = [], [], [], set()
+    for holder, related_field, instance in entries:
+        if holder.marked_for_removal:
+            removed_holders.append(holder)
+            continue
+        construct_instance(holder, holder.instance)
+        if related_field:
+            setattr(holder.instance, related_field, instance)
+        if holder.instance._state.adding:
+            created_holders.append(holder)
+        elif changed_fields := get_update_fields(holder, related_field):
+            updated_holders.append(holder)
+            update_fields.update(changed_fields)
+    if connections[manager.db].features.can_return_rows_from_bulk_insert:
+        single_holders = []
+    else:
+        # without primary keys, the related objects of created forms could not be saved
+        single_holders, created_holders = created_holders, []
+    try:
+        with transaction.atomic(using=manager.db):
+            if removed_pks := [h.instance.pk for h in removed_holders if h.instance.pk is not None]:
+                manager.filter(pk__in=removed_pks).delete()
+            if updated_holders:
+                for holder in updated_holders:
+                    for field in model._meta.concrete_fields:
+                        if field.name in update_fields:
+                            setattr(holder.instance, field.attname, field.pre_save(holder.instance, False))
+                manager.bulk_update([h.instance for h in updated_holders], update_fields)
+            if created_holders:
+                manager.bulk_create([h.instance for h in created_holders])
+    except (IntegrityError, ValueError):
+        # the failing form can not be determined from a bulk query, hence repeat form by form
+        for holder in removed_holders:
+            if holder.instance.pk is not None:
+                holder.instance.delete()
+        single_holders = updated_holders + created_holders + single_holders
+    else:
+        m2m_fields = [f.name for f in chain(model._meta.many_to_many, model._meta.private_fields)]
+        for holder in updated_holders + created_holders:
+            if any(name in holder.fields for name in m2m_fields):
+                holder._save_m2m()
+    for holder in single_holders:
+        try:
+            with transaction.atomic(using=manager.db):
+                holder.save()
+        except (IntegrityError, ValueError) as error:
+            # some errors are caught only after attempting to save
+            holder._update_errors(error)
+
+
+def get_update_fields(holder, related_field=None):
+    """
+    Return the names of the model fields to be updated for the object of the given model form. Changes
+    are detected by comparing that object with its values as retrieved before validating the form,
+    rather than with the form's initial data, which belongs to another object after its siblings have
+    been reordered. Without these values, all editable fields of the form are updated.
+    """
+    instance = holder.instance
+    concrete_fields = instance._meta.concrete_fields
+    if (retrieved_values := getattr(holder, 'retrieved_values', None)) is None:
+        update_fields = [
+            f.name for f in concrete_fields if f.editable and not f.primary_key and f.name in holder.fields
+        ]
+        if update_fields and related_field:
+            update_fields.append(related_field)
+    else:
+        update_fields = [
+            f.name for f in concrete_fields
+            if not f.primary_key and getattr(instance, f.attname) != retrieved_values[f.attname]
+        ]
+    if update_fields:
+        update_fields.extend(
+            f.name for f in concrete_fields if getattr(f, 'auto_now', False) and f.name not in update_fields
+        )
+    return update_fields
+
+
+class PersistencePlan:
+    """
+    Persist the model forms of a validated collection with siblings, together with those of the
+    collections with siblings nested inside, in level order. The objects of each model and nesting
+    level are deleted, created and updated using one bulk query each. Since a level is saved before
+    the level below, the primary keys generated for parent objects are propagated to their children
+    through the ``related_field`` of the nested collection.
+    """
+    def __init__(self, collection, instance=None):
+        self.levels = []
+        collections = [(collection, instance)]
+        while collections:
+            entries_by_model, deferred_holders, nested_collections = {}, [], []
+            for collection, instance in collections:
+                for valid_holders in collection.valid_holders:
+                    for holder in valid_holders.values():
+                        if isinstance(holder, BaseModelForm):
+                            entry = holder, getattr(collection, 'related_field', None), instance
+                            entries_by_model.setdefault(holder._meta.model, []).append(entry)
+                        elif self.is_plannable(holder):
+                            nested_collections.append((holder, holder.instance))
+                        elif callable(getattr(holder, 'construct_instance', None)):
+                            # holders with their own persistence logic run after their parents have been saved
+                            deferred_holders.append(holder)
+            self.levels.append((entries_by_model, deferred_holders))
+            collections = nested_collections
+
+    @staticmethod
+    def is_plannable(holder):
+        return (
+            isinstance(holder, BaseFormCollection) and holder.has_many
+            and type(holder).construct_instance is BaseFormCollection.construct_instance
+        )
+
+    def execute(self):
+        for entries_by_model, deferred_holders in self.levels:
+            for model, entries in entries_by_model.items():
+                bulk_save_model_forms(model, entries)
+            for holder in deferred_holders:
+                holder.construct_instance(holder.instance)
+
 
 class BaseFormCollection(HolderMixin, RenderableMixin):
     """
@@ -83,6 +400,15 @@ class BaseFormCollection(HolderMixin, RenderableMixin):
     help_text = None
     add_label = None
     ignore_marked_for_removal = None
+    template_cache = getattr(settings, 'FORMSET_TEMPLATE_CACHE', None)
+    template_cache_timeout = DEFAULT_TIMEOUT
+    share_templates = getattr(settings, 'FORMSET_SHARE_TEMPLATES', False)
+    lazy_siblings = getattr(settings, 'FORMSET_LAZY_SIBLINGS', False)
+    siblings_window = None
+    bulk_persistence = False
+    prefetch_lookups = []
+    window_offset = 0
+    loaded_siblings = None
     empty_values = list(validators.EMPTY_VALUES)
 
     def __init__(self, data=None, initial=None, renderer=None, auto_id=None, prefix=None, instance=None, partial=None,
@@ -129,6 +455,7 @@ class BaseFormCollection(HolderMixin, RenderableMixin):
         self.renderer = renderer
 
     def iter_single(self):
+        choice_cache = ChoiceCache() if self.choice_cache is None else self.choice_cache
         for name, declared_holder in self.declared_holders.items():
             prefix = f'{self.prefix}.{name}' if self.prefix else name
             initial = None
@@ -142,13 +469,16 @@ class BaseFormCollection(HolderMixin, RenderableMixin):
                 prefix=prefix,
                 renderer=self.renderer,
                 ignore_marked_for_removal=self.ignore_marked_for_removal,
+                choice_cache=choice_cache,
             )
             holder.is_single = True
             yield holder
 
     def iter_many(self):
+        # siblings rendered during this pass share the querysets evaluated for their choice fields
+        choice_cache = ChoiceCache() if self.choice_cache is None else self.choice_cache
         if self.initial:
-            if not isinstance(self.initial, list):
+            if not isinstance(self.initial, Sequence) or isinstance(self.initial, str):
                 errmsg = "{class_name} is declared to have siblings, but provided argument `{argument}` is not a list"
                 raise FormCollectionError(errmsg.format(class_name=self.__class__.__name__, argument='initial'))
             num_siblings = max(self.min_siblings, len(self.initial) + self.extra_siblings)
@@ -157,14 +487,21 @@ class BaseFormCollection(HolderMixin, RenderableMixin):
         else:
             num_siblings = max(self.min_siblings, self.extra_siblings)
 
+        # in windowed mode, render only the siblings starting at `window_offset`
+        start, stop = 0, num_siblings
+        if self.siblings_window:
+            start = self.window_offset
+            stop = min(num_siblings, start + self.siblings_window)
+        window_initial = self.initial[start:stop] if self.initial else []
+
         first, last = 0, len(self.declared_holders.items()) - 1
         # add initialized collections/forms
-        for position in range(num_siblings):
+        for position in range(start, stop):
             for item_num, (name, declared_holder) in enumerate(self.declared_holders.items()):
                 prefix = f'{self.prefix}.{position}.{name}' if self.prefix else f'{position}.{name}'
                 initial = None
-                if self.initial and position < len(self.initial):
-                    initial = self.initial[position].get(name)
+                if position - start < len(window_initial):
+                    initial = window_initial[position - start].get(name)
                 if initial is None:
                     initial = declared_holder.initial
                 holder = declared_holder.replicate(
@@ -173,15 +510,25 @@ class BaseFormCollection(HolderMixin, RenderableMixin):
                     prefix=prefix,
                     renderer=self.renderer,
                     ignore_marked_for_removal=self.ignore_marked_for_removal,
+                    choice_cache=choice_cache,
                 )
                 holder.position = position
                 if item_num == first:
                     holder.is_first = True
                 if item_num == last:
                     holder.is_last = True
+                    if position == stop - 1 and stop < num_siblings:
+                        # sentinel to load the next window of siblings
+                        holder.next_window_offset = stop
                 if initial in self.empty_values and (position >= self.min_siblings or self.fresh_and_empty):
                     holder.fresh_and_empty = True
                 yield holder
+        if start > 0:
+            # further windows are appended to the already rendered siblings, hence they don't need a template
+            return
+        if self.lazy_siblings or self.shared_template_id:
+            # the template for extra collections is fetched on demand or rendered only once, see `render()`
+            return
         # add empty placeholder as template for extra collections
         for item_num, (name, declared_holder) in enumerate(self.declared_holders.items()):
             if self.prefix:
@@ -197,19 +544,120 @@ class BaseFormCollection(HolderMixin, RenderableMixin):
             else:
                 position = '${position}'
                 prefix = f'${{siblingId}}.{name}'
-            holder = declared_holder.replicate(
-                prefix=prefix,
-                renderer=self.renderer,
-                ignore_marked_for_removal=self.ignore_marked_for_removal,
+            replicate = partial(
+                self._replicate_template,
+                declared_holder,
+                position=position,
+                is_first=item_num == first,
+                is_last=item_num == last,
+                choice_cache=choice_cache,
             )
-            holder.is_template = True
-            holder.position = position
-            if item_num == first:
-                holder.is_first = True
-            if item_num == last:
-                holder.is_last = True
+            holder = replicate(prefix)
+            if self.template_cache:
+                cache, cache_key = caches[self.template_cache], self.get_template_cache_key(name, holder)
+                pattern, parent_positions = split_parent_positions(prefix)
+                holder = CachedTemplateHolder(
+                    holder, cache, cache_key, self.template_cache_timeout, partial(replicate, pattern), parent_positions
+                )
             yield holder
 
+    def _replicate_template(self, declared_holder, prefix, position, is_first, is_last, choice_cache):
+        holder = declared_holder.replicate(
+            prefix=prefix,
+            renderer=self.renderer,
+            ignore_marked_for_removal=self.ignore_marked_for_removal,
+            choice_cache=choice_cache,
+        )
+        holder.is_template = True
+        holder.position = position
+        if is_first:
+            holder.is_first = True
+        if is_last:
+            holder.is_last = True
+        return holder
+
+    @cached_property
+    def shared_template_id(self):
+        """
+        While rendering with ``share_templates`` enabled, collections with siblings nested inside
+        other siblings share the template for their extra siblings. Each distinct template, keyed by
+        the prefix pattern where the parent's sibling positions are replaced by placeholders, then is
+        rendered only once. Return the id of that shared template or ``None``.
+        """
+        shared_templates = _shared_templates.get()
+        if shared_templates is None or not self.has_many or self.lazy_siblings:
+            return
+        if not self.prefix or '${' in self.prefix:
+            return
+        pattern, parent_positions = split_parent_positions(self.prefix)
+        if not parent_positions:
+            return
+        template_id = 'shared-template-{}'.format(re.sub(r'\$\{parent_\d+}', '*', pattern))
+        if template_id not in shared_templates:
+            replica = self._replicate_without_siblings(pattern, self.renderer)
+            shared_templates[template_id] = pattern, replica.render()
+        return template_id
+
+    def _replicate_without_siblings(self, prefix, renderer):
+        replica = self.replicate(
+            prefix=prefix,
+            renderer=renderer,
+            ignore_marked_for_removal=self.ignore_marked_for_removal,
+            choice_cache=self.choice_cache,
+        )
+        replica.prefix = prefix
+        replica.initial = None
+        replica.min_siblings = replica.extra_siblings = 0
+        replica.lazy_siblings = False
+        return replica
+
+    def render_extra_sibling(self, position=None, renderer=None):
+        """
+        Render this collection without siblings, but with the template used by the client to add
+        extra siblings. If ``position`` is given, render just the extra sibling for that position.
+        """
+        assert self.has_many, "Method `render_extra_sibling()` can be applied only on a collection with siblings"
+        html = self._replicate_without_siblings(self.prefix, renderer or self.renderer).render()
+        if position is None:
+            return html
+
+        def substitute(match):
+            # same context rewriting as applied by the client when adding a sibling
+            name, _, level = match.group(1).partition('_')
+            if name not in ['position', 'siblingId']:
+                return match.group(0)
+            if not level:
+                return str(position)
+            level = int(level) - 1
+            return f'${{{name}_{level}}}' if level else f'${{{name}}}'
+
+        start = html.index('class="empty-collection">') + len('class="empty-collection">')
+        end = html.rindex('</template>')
+        return mark_safe(re.sub(r'\$\{([^} ]+)}', substitute, html[start:end]))
+
+    def get_template_cache_key(self, name, holder):
+        """
+        Return the cache key for the rendered template of the holder named ``name``. Override this
+        method, if the markup of that template depends on anything else than the collection class,
+        the prefix pattern, the renderer's class and configuration and the active language.
+        """
+        renderer = holder.renderer
+        parts = [
+            f'{self.__class__.__module__}.{self.__class__.__qualname__}',
+            name,
+            '.'.join('#' if part.isdigit() else part for part in holder.prefix.split('.')),
+            str(self.auto_id),
+            f'{renderer.__class__.__module__}.{renderer.__class__.__qualname__}',
+            *(f'{attr}={sorted_css_classes(getattr(renderer, attr, None))}' for attr in (
+                'field_css_classes', 'label_css_classes', 'control_css_classes', 'form_css_classes',
+                'fieldset_css_classes', 'collection_css_classes',
+            )),
+            f'max_options_per_line={getattr(renderer, "max_options_per_line", None)}',
+            f'exempt_feedback={getattr(renderer, "exempt_feedback", None)}',
+            get_language(),
+        ]
+        return 'formset:template:{}'.format(md5('\n'.join(parts).encode(), usedforsecurity=False).hexdigest())
+
     def __iter__(self):
         if self.has_many:
             yield from self.iter_many()
@@ -247,11 +695,18 @@ class BaseFormCollection(HolderMixin, RenderableMixin):
         if self.has_many:
             self.valid_holders = []
             self._errors = ErrorList()
+            rows = [data for data in self.data if data is not None]
+            # slice the initial data once, since it may be a `LazyModelsList`
+            initials = list(self.initial[:len(self.data)]) if self.initial else []
+            instances = iter(self.retrieve_instances(rows))
+            # siblings validated during this pass share the objects resolved for their model choice fields
+            choice_cache = ChoiceCache() if self.choice_cache is None else self.choice_cache
+            self.prime_choice_fields(rows, choice_cache)
             for index, data in enumerate(self.data):
                 if data is None:
                     continue
-                initial = self.initial[index] if self.initial and index < len(self.initial) else None
-                instance = self.retrieve_instance(data)
+                initial = initials[index] if index < len(initials) else None
+                instance = next(instances)
                 valid_holders = {}
                 errors = ErrorDict()
                 for name, declared_holder in self.declared_holders.items():
@@ -261,7 +716,14 @@ class BaseFormCollection(HolderMixin, RenderableMixin):
                             initial=initial.get(name, declared_holder.initial) if initial else None,
                             instance=instance,
                             ignore_marked_for_removal=self.ignore_marked_for_removal,
+                            choice_cache=choice_cache,
                         )
+                        if isinstance(holder, BaseModelForm) and not holder.instance._state.adding:
+                            # validating the form modifies its object, hence remember the retrieved values
+                            holder.retrieved_values = {
+                                f.attname: getattr(holder.instance, f.attname)
+                                for f in holder.instance._meta.concrete_fields
+                            }
                         if MARKED_FOR_REMOVAL in holder.data:
                             if holder.ignore_marked_for_removal:
                                 break
@@ -269,8 +731,9 @@ class BaseFormCollection(HolderMixin, RenderableMixin):
                                 holder.marked_for_removal = True
                             elif self.has_many:
                                 self.marked_for_removal = True
-                        if holder.is_valid():
-                            valid_holders[name] = holder
+                        with choice_cache.activate():
+                            if holder.is_valid():
+                                valid_holders[name] = holder
                         errors[name] = holder._errors
                     elif not self.partial:
                         # can only happen, if client bypasses browser control
@@ -302,6 +765,31 @@ class BaseFormCollection(HolderMixin, RenderableMixin):
                     # can only happen, if client bypasses browser control
                     self._errors[name] = {NON_FIELD_ERRORS: ["Form data is missing."]}
 
+    def prime_choice_fields(self, rows, choice_cache):
+        """
+        Gather the values submitted by all rows for each model choice field of the forms in this
+        collection and resolve them using one query per field. Cleaning these fields in each sibling
+        then just looks up the chosen objects in the given choice cache.
+        """
+        for name, declared_holder in self.declared_holders.items():
+            if not isinstance(declared_holder, BaseForm):
+                continue
+            for field_name, field in declared_holder.fields.items():
+                if not isinstance(field, ModelChoiceField) or field.queryset is None:
+                    continue
+                is_multiple = isinstance(field, ModelMultipleChoiceField)
+                values = []
+                for data in rows:
+                    try:
+                        value = data[name][field_name]
+                    except (KeyError, TypeError):
+                        continue
+                    if not is_multiple:
+                        values.append(value)
+                    elif isinstance(value, (list, tuple)):
+                        values.extend(value)
+                choice_cache.prime(field, values)
+
     def validate_unique(self):
         unique_fields = {self.related_field} if getattr(self, 'related_field', None) else set()
         all_unique_checks = set()
@@ -362,6 +850,9 @@ class BaseFormCollection(HolderMixin, RenderableMixin):
             (all(not h.marked_for_removal for h in vh.values()) for vh in self.valid_holders),
             0
         )
+        if self.loaded_siblings is not None and self.initial:
+            # the siblings of windows not loaded by the client have not been submitted and remain unchanged
+            num_valid_siblings += max(len(self.initial) - self.loaded_siblings, 0)
         collection_name = self.legend if self.legend else self.__class__.__name__
         if num_valid_siblings < self.min_siblings:
             self._errors.clear()
@@ -372,6 +863,15 @@ class BaseFormCollection(HolderMixin, RenderableMixin):
             msg = gettext_lazy("Too many entries in “{collection_name}”, please remove one.")
             self._errors.append({COLLECTION_ERRORS: [msg.format(collection_name=collection_name)]})
 
+    def retrieve_instances(self, rows):
+        """
+        Hook to retrieve the main objects for all rows of a multi object collection at once, before
+        these rows are validated. It shall return a list containing the object for each row. Override
+        this method to fetch the objects using one query, for instance using ``Model.objects.in_bulk()``.
+        The default implementation calls ``retrieve_instance()`` for each row.
+        """
+        return [self.retrieve_instance(data) for data in rows]
+
     def retrieve_instance(self, data):
         """
         Hook to retrieve the main object for a multi object collection.
@@ -403,7 +903,107 @@ class BaseFormCollection(HolderMixin, RenderableMixin):
     def render(self, template_name=None, context=None, renderer=None):
         if not (renderer or self.renderer):
             renderer = FormRenderer()
-        return super().render(template_name, context, renderer)
+        if not self.share_templates or _shared_templates.get() is not None:
+            return super().render(template_name, context, renderer)
+        shared_templates = {}
+        token = _shared_templates.set(shared_templates)
+        try:
+            html = super().render(template_name, context, renderer)
+        finally:
+            _shared_templates.reset(token)
+        return html + self._render_shared_templates(shared_templates)
+
+    @staticmethod
+    def _render_shared_templates(shared_templates):
+        return format_html_join(
+            '',
+            '<template id="{}" prefix="{}" class="shared-collection">{}</template>',
+            ((template_id, pattern, markup) for template_id, (pattern, markup) in shared_templates.items()),
+        )
+
+    def render_siblings_window(self, renderer=None):
+        """
+        Render just the siblings of the window starting at ``window_offset``, without the markup
+        preceding and following them, so that they can be appended to the siblings rendered before.
+        """
+        renderer = renderer or self.renderer or FormRenderer()
+        holders = [holder for holder in self.iter_many() if not getattr(holder, 'is_template', False)]
+        context = dict(self.get_context(), collection=CollectionChunk(self, holders))
+        if not self.share_templates:
+            return mark_safe(renderer.render(self.template_name, context))
+        # the shared templates of nested collections already have been rendered with the first window
+        token = _shared_templates.set({})
+        try:
+            return mark_safe(renderer.render(self.template_name, context))
+        finally:
+            _shared_templates.reset(token)
+
+    def render_iter(self, template_name=None, context=None, renderer=None):
+        """
+        Render this collection as a sequence of HTML fragments, which concatenated give the same result
+        as ``render()``. Collections with siblings yield their head, each sibling and their tail as
+        separate fragments, so that a response can be streamed while the siblings are being rendered.
+        Collections without siblings yield the fragments of their sub-collections in between.
+        """
+        renderer = renderer or self.renderer or FormRenderer()
+        template_name = template_name or self.template_name
+        context = context or self.get_context()
+        if self.share_templates and _shared_templates.get() is None:
+            shared_templates = {}
+        else:
+            shared_templates = None
+
+        def render_chunk(holders, **kwargs):
+            chunk_context = dict(context, collection=CollectionChunk(self, holders, **kwargs))
+            if shared_templates is None:
+                return mark_safe(renderer.render(template_name, chunk_context))
+            token = _shared_templates.set(shared_templates)
+            try:
+                return mark_safe(renderer.render(template_name, chunk_context))
+            finally:
+                _shared_templates.reset(token)
+
+        def render_nested(holder):
+            placeholder = CollectionPlaceholder(holder)
+            head, _, tail = render_chunk([placeholder]).partition(placeholder.marker)
+            yield mark_safe(head)
+            chunks = holder.render_iter()
+            while True:
+                # the sub-collection adds its shared templates to those of this collection
+                token = None if shared_templates is None else _shared_templates.set(shared_templates)
+                try:
+                    chunk = next(chunks, None)
+                finally:
+                    if token:
+                        _shared_templates.reset(token)
+                if chunk is None:
+                    break
+                yield chunk
+            yield mark_safe(tail)
+
+        yield render_chunk([], omit_head=False)
+        if self.has_many:
+            sibling, template_holders = [], []
+            for holder in self.iter_many():
+                if getattr(holder, 'is_template', False):
+                    template_holders.append(holder)
+                    continue
+                if sibling and holder.position != sibling[0].position:
+                    yield render_chunk(sibling)
+                    sibling = []
+                sibling.append(holder)
+            if sibling:
+                yield render_chunk(sibling)
+            yield render_chunk(template_holders, omit_tail=False)
+        else:
+            for holder in self.iter_single():
+                if isinstance(holder, BaseFormCollection):
+                    yield from render_nested(holder)
+                else:
+                    yield render_chunk([holder])
+            yield render_chunk([], omit_tail=False)
+        if shared_templates:
+            yield self._render_shared_templates(shared_templates)
 
     def model_to_dict(self, instance):
         """
@@ -442,9 +1042,45 @@ class BaseFormCollection(HolderMixin, RenderableMixin):
         models by following the reverse relations through the given foreign keys.
         """
         assert self.has_many, "Method `models_to_list()` can be applied only on a collection with siblings"
-        data = [self.model_to_dict(instance) for instance in queryset.all()]
+        data = [self.model_to_dict(instance) for instance in self.prefetch_queryset(queryset)]
         return data
 
+    def prefetch_queryset(self, queryset):
+        """
+        Return a copy of the given queryset, which prefetches the related objects traversed by
+        `model_to_dict()`. This requires one query per relation and nesting level, rather than
+        one query per relation and object.
+        """
+        if getattr(queryset, '_result_cache', None) is not None:
+            # objects and their relations have been prefetched by the parent collection
+            return queryset
+        queryset = queryset.all()
+        if prefetch_lookups := self.get_prefetch_lookups(queryset.model):
+            queryset = queryset.prefetch_related(*prefetch_lookups)
+        return queryset
+
+    def get_prefetch_lookups(self, model):
+        """
+        Return those lookups of `prefetch_lookups` which follow a relation to many objects of the given model.
+        Holders not named after such a relation are skipped, since `model_to_dict()` ignores them as well.
+        """
+        def get_related_model(model, name):
+            for field in model._meta.get_fields():
+                if not (field.one_to_many or field.many_to_many):
+                    continue
+                if (field.get_accessor_name() if field.auto_created and not field.concrete else field.name) == name:
+                    return field.related_model
+
+        prefetch_lookups = []
+        for lookup in self.prefetch_lookups:
+            related_model = model
+            for name in lookup.split('__'):
+                if (related_model := get_related_model(related_model, name)) is None:
+                    break
+            else:
+                prefetch_lookups.append(lookup)
+        return prefetch_lookups
+
     def construct_instance(self, instance=None):
         """
         Construct the main instance and all its related objects from the nested dictionary. This
@@ -456,7 +1092,9 @@ class BaseFormCollection(HolderMixin, RenderableMixin):
         inside their related models.
         """
         assert self.is_valid(), f"Can not construct instance with invalid collection {self.__class__} object"
-        if self.has_many:
+        if self.has_many and self.bulk_persistence:
+            PersistencePlan(self, instance).execute()
+        elif self.has_many:
             for valid_holders in self.valid_holders:
                 # first, handle holders which are forms
                 for name, holder in valid_holders.items():
@@ -501,10 +1139,10 @@ class FormCollection(BaseFormCollection, metaclass=FormCollectionMeta):
     Base class for a collection of forms. Attributes of this class which inherit from
     `django.forms.forms.BaseForm` are managed by this class.
     """
-    def get_field(self, field_path):
-        if self.has_many:
-            index, key, path = field_path.split('.', 2)
-            int(index)  # raises ValueError if index is not an integer
-        else:
-            key, path = field_path.split('.', 1)
-        return self.declared_holders[key].get_field(path)
+    @classmethod
+    def get_field(cls, field_path):
+        """
+        Return the field addressed by `field_path`. Raises `KeyError` if there is no such field.
+        """
+        field_path = '.'.join('*' if part.isdigit() else part for part in field_path.split('.'))
+        return cls.field_index[field_path]
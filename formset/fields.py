@@ -2,7 +2,8 @@ from django.core import checks
 from django.db.models.fields.related import ManyToManyField
 from django.forms import fields
 
-from formset.utils import FileFieldMixin, HolderMixin
+from formset.choices import ChoiceSourceFieldMixin
+from formset.utils import FileFieldMixin, HolderMixin, mixin_class
 from formset.widgets import Button, DualSortableSelector, UploadedFileInput
 
 
@@ -14,6 +15,20 @@ class FileField(FileFieldMixin, fields.FileField):
     widget = UploadedFileInput
 
 
+class ChoiceField(ChoiceSourceFieldMixin, fields.ChoiceField):
+    """
+    A replacement for the built-in ChoiceField validating the submitted value against a
+    :class:`formset.choices.ChoiceSource` without materializing all of its choices.
+    """
+
+
+class MultipleChoiceField(ChoiceSourceFieldMixin, fields.MultipleChoiceField):
+    """
+    A replacement for the built-in MultipleChoiceField validating the submitted values against a
+    :class:`formset.choices.ChoiceSource` without materializing all of its choices.
+    """
+
+
 class Activator(HolderMixin, fields.Field):
     default_renderer = None
     widget = Button(action='activate')
@@ -91,11 +106,7 @@ class SortableManyToManyField(ManyToManyField):
 
     def formfield(self, **kwargs):
         form_field = super().formfield(**kwargs)
-        form_field.__class__ = type(
-            form_field.__class__.__name__,
-            (SortableMultipleChoiceMixin, form_field.__class__),
-            {}
-        )
+        form_field.__class__ = mixin_class(SortableMultipleChoiceMixin, form_field.__class__)
         if not isinstance(form_field.widget, DualSortableSelector):
             form_field.widget = DualSortableSelector()
         return form_field
@@ -83,6 +83,7 @@ class FormRenderer(DefaultFormRenderer):
         context.update(
             add_collection_button='formset/bootstrap/buttons/add_collection.html',
             remove_collection_button='formset/bootstrap/buttons/remove_collection.html',
+            load_siblings_button='formset/bootstrap/buttons/load_siblings.html',
             help_text_template='formset/bootstrap/help_text.html',
         )
         return context
@@ -55,6 +55,7 @@ class FormRenderer(DefaultFormRenderer):
         context.update({
             'add_collection_button': 'formset/bulma/buttons/add_collection.html',
             'remove_collection_button': 'formset/bulma/buttons/remove_collection.html',
+            'load_siblings_button': 'formset/bulma/buttons/load_siblings.html',
         })
         return context
 
@@ -1,11 +1,122 @@
 import copy
 import types
 
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.forms.renderers import DjangoTemplates
 from django.utils.html import format_html
 
 from formset.renderers import ClassList
 
+_template_engines = {}
+
+
+def _overlay(value):
+    if type(value) is dict:
+        return ContextOverlay(value)
+    if type(value) is list:
+        return _ListOverlay(value)
+    if type(value) is tuple:
+        return _TupleOverlay(value)
+    if isinstance(value, set):
+        return copy.copy(value)
+    return value
+
+
+def _materialize(value):
+    return value.materialize() if isinstance(value, (ContextOverlay, _ListOverlay, _TupleOverlay)) else value
+
+
+class ContextOverlay(dict):
+    """
+    Copy-on-write replacement for a rendering context, passed to the context modifiers of a renderer.
+    Nested dicts, lists, tuples and sets are copied shallowly, if and when a modifier accesses them.
+    Parts of the context not accessed by a modifier, such as the options of large select fields, hence
+    are never copied.
+    """
+    def __init__(self, original):
+        super().__init__(original)
+        self._overlays = {}
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if self._overlays.get(key) is not value and (overlay := _overlay(value)) is not value:
+            super().__setitem__(key, overlay)
+            self._overlays[key] = value = overlay
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def items(self):
+        return ((key, self[key]) for key in self)
+
+    def values(self):
+        return (self[key] for key in self)
+
+    def materialize(self):
+        """
+        Return a plain dict, where all accessed parts are replaced by their modified copies.
+        """
+        result = self.copy()
+        for key, overlay in self._overlays.items():
+            if result.get(key) is overlay:
+                result[key] = _materialize(overlay)
+        return result
+
+
+class _ListOverlay(list):
+    def __init__(self, original):
+        super().__init__(original)
+        self._overlays = {}
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        value = super().__getitem__(index)
+        if index < 0:
+            index += len(self)
+        if self._overlays.get(index) is not value and (overlay := _overlay(value)) is not value:
+            super().__setitem__(index, overlay)
+            self._overlays[index] = value = overlay
+        return value
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+    def materialize(self):
+        return [_materialize(value) for value in super().__iter__()]
+
+
+class _TupleOverlay(tuple):
+    def __new__(cls, original):
+        overlay = super().__new__(cls, original)
+        overlay._overlays = {}
+        return overlay
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self[i] for i in range(*index.indices(len(self))))
+        value = super().__getitem__(index)
+        if index < 0:
+            index += len(self)
+        if index not in self._overlays:
+            self._overlays[index] = _overlay(value)
+        return self._overlays[index]
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+    def materialize(self):
+        return tuple(_materialize(self._overlays.get(index, value)) for index, value in enumerate(super().__iter__()))
+
+
+@receiver(setting_changed)
+def _reset_template_engines(setting, **kwargs):
+    if setting in ('DEBUG', 'INSTALLED_APPS'):
+        _template_engines.clear()
+
 
 class FormRenderer(DjangoTemplates):
     """
@@ -40,6 +151,15 @@ class FormRenderer(DjangoTemplates):
             self.exempt_feedback = exempt_feedback
         super().__init__()
 
+    @property
+    def engine(self):
+        # All renderers share one template engine per backend, so that each template is compiled only once
+        # rather than once per renderer instance.
+        key = self.backend, settings.DEBUG
+        if key not in _template_engines:
+            _template_engines.setdefault(key, super().engine)
+        return _template_engines[key]
+
     def get_template(self, template_name):
         template_name = self._template_mapping.get(template_name, template_name)
         return super().get_template(template_name)
@@ -107,6 +227,7 @@ class FormRenderer(DjangoTemplates):
         context.update(
             add_collection_button='formset/default/buttons/add_collection.html',
             remove_collection_button='formset/default/buttons/remove_collection.html',
+            load_siblings_button='formset/default/buttons/load_siblings.html',
             help_text_template='formset/default/help_text.html',
             css_classes=self.collection_css_classes,
             add_collection_label=context['collection'].add_label,
@@ -133,22 +254,18 @@ class FormRenderer(DjangoTemplates):
     @classmethod
     def _copy_context(cls, context):
         """
-        Make a semi-deep copy of context. This is required since the amend-methods
-        modify the context before rendering. Python's `copy.deepcopy()` doesn't work
-        here, because the File field's _io.BufferedReader can't be pickled.
+        Make a copy-on-write replica of the context. This is required since the amend-methods
+        modify the context before rendering. Python's `copy.deepcopy()` would be too expensive
+        for large contexts and doesn't work here, because the File field's _io.BufferedReader
+        can't be pickled.
         """
-        replica = context.copy()
-        if 'attrs' in context:
-            replica['attrs'] = copy.deepcopy(context['attrs'])
-        if 'widget' in context:
-            replica['widget'] = copy.deepcopy(context['widget'])
-        return replica
+        return ContextOverlay(context)
 
     def render(self, template_name, context, request=None):
-        context = self._copy_context(context)
         context_modifier = self._context_modifiers.get(template_name)
         if callable(context_modifier):
-            context = types.MethodType(context_modifier, self)(context)
+            context = types.MethodType(context_modifier, self)(self._copy_context(context))
+            context = _materialize(context)
         template = self.get_template(template_name)
         return template.render(context, request=request).strip()
 
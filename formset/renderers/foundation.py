@@ -31,6 +31,7 @@ class FormRenderer(DefaultFormRenderer):
         context.update({
             'add_collection_button': 'formset/foundation/buttons/add_collection.html',
             'remove_collection_button': 'formset/foundation/buttons/remove_collection.html',
+            'load_siblings_button': 'formset/foundation/buttons/load_siblings.html',
         })
         return context
 
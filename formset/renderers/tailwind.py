@@ -105,6 +105,7 @@ class FormRenderer(DefaultFormRenderer):
         context.update(
             add_collection_button='formset/tailwind/buttons/add_collection.html',
             remove_collection_button='formset/tailwind/buttons/remove_collection.html',
+            load_siblings_button='formset/tailwind/buttons/load_siblings.html',
             help_text_template='formset/tailwind/help_text.html',
         )
         return context
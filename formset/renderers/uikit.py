@@ -46,6 +46,7 @@ class FormRenderer(DefaultFormRenderer):
         context.update({
             'add_collection_button': 'formset/uikit/buttons/add_collection.html',
             'remove_collection_button': 'formset/uikit/buttons/remove_collection.html',
+            'load_siblings_button': 'formset/uikit/buttons/load_siblings.html',
         })
         return context
 
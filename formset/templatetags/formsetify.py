@@ -5,14 +5,14 @@ from django.template.exceptions import TemplateSyntaxError
 from django.utils.module_loading import import_string
 
 from formset.renderers.default import FormRenderer
-from formset.utils import FormMixin, FormsetErrorList
+from formset.utils import FormMixin, FormsetErrorList, mixin_class
 
 
 def _formsetify(form, *args, **kwargs):
     assert isinstance(form, BaseForm), \
         "Must be applied to a Form object inheriting from 'django.forms.BaseForm'."
     if not isinstance(form, FormMixin):
-        form.__class__ = type(form.__class__.__name__, (FormMixin, form.__class__), {})
+        form.__class__ = mixin_class(FormMixin, form.__class__)
 
     renderer_args = [
         ('form_css_classes', kwargs.pop('form_classes', None)),
@@ -1,9 +1,11 @@
 import copy
+from collections.abc import MutableMapping
 from pathlib import Path
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.forms.utils import ErrorDict, ErrorList, RenderableMixin
+from django.utils.datastructures import MultiValueDict
 from django.utils.functional import cached_property
 from django.utils.safestring import mark_safe
 
@@ -11,6 +13,22 @@ from formset.renderers.default import FormRenderer
 
 MARKED_FOR_REMOVAL = '_marked_for_removal_'
 
+_mixin_classes = {}
+
+
+def mixin_class(mixin, base_class, **attrs):
+    """
+    Return a class named after ``base_class`` inheriting from ``mixin`` and ``base_class``. This
+    class is created only once for each combination of mixin, base class and extra attributes.
+    Use it whenever the class of an object has to be replaced at runtime.
+    """
+    key = mixin, base_class, tuple(sorted(attrs.items()))
+    try:
+        return _mixin_classes[key]
+    except KeyError:
+        attrs.setdefault('__module__', base_class.__module__)
+        return _mixin_classes.setdefault(key, type(base_class.__name__, (mixin, base_class), attrs))
+
 
 class FormsetErrorList(ErrorList):
     template_name = 'formset/default/field_errors.html'
@@ -33,24 +51,75 @@ class FormsetErrorList(ErrorList):
         }
 
 
+class SharedFields(MutableMapping):
+    """
+    The fields of a form replicated by a FormCollection. All replicas of a declared form share the same
+    fields rather than copying them for each sibling. As soon as one replica adds, replaces or removes
+    a field, that replica receives its own deep copy of the fields (copy-on-write).
+
+    A replica altering the attributes of one of its fields in place, must call :meth:`detach` beforehand.
+    """
+    def __init__(self, fields, form):
+        self._fields = fields
+        self._form = form
+
+    def __getitem__(self, name):
+        return self._fields[name]
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __setitem__(self, name, field):
+        self.detach()[name] = field
+
+    def __delitem__(self, name):
+        del self.detach()[name]
+
+    def __repr__(self):
+        return repr(self._fields)
+
+    def detach(self):
+        """
+        Replace the shared fields of the owning form by a private copy and return it.
+        """
+        if self._form is not None:
+            self._fields = copy.deepcopy(self._fields)
+            self._form.fields = self._fields
+            self._form = None
+        return self._fields
+
+
 class HolderMixin:
     ignore_marked_for_removal = getattr(settings, 'FORMSET_IGNORE_MARKED_FOR_REMOVAL', False)
     marked_for_removal = False
     partial = None
+    choice_cache = None
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
     def replicate(self, data=None, initial=None, auto_id=None, prefix=None, instance=None, partial=None, renderer=None,
-                  ignore_marked_for_removal=None):
+                  ignore_marked_for_removal=None, choice_cache=None):
         replica = copy.copy(self)
+        if 'fields' in self.__dict__:
+            # siblings share the fields of their declared form until one of them modifies them
+            fields = self.fields._fields if isinstance(self.fields, SharedFields) else self.fields
+            replica.fields = SharedFields(fields, replica)
+            replica._bound_fields_cache = {}
+            replica.__dict__.pop('form_id', None)
         if hasattr(self, 'declared_holders'):
+            replica.__dict__.pop('shared_template_id', None)
             replica.declared_holders = {
                 key: holder.replicate(
                     renderer=renderer,
                     ignore_marked_for_removal=ignore_marked_for_removal,
+                    choice_cache=choice_cache,
                 ) for key, holder in self.declared_holders.items()
             }
+        replica.choice_cache = choice_cache
         replica.data = data
         replica.is_bound = data is not None
         replica._errors = None
@@ -59,7 +128,7 @@ class HolderMixin:
         except AttributeError:
             pass
         if hasattr(replica, 'files'):
-            replica.files.clear()
+            replica.files = MultiValueDict()
         if initial:
             replica.initial = initial
         if auto_id:
@@ -1,21 +1,26 @@
 import json
 
-from django.core.exceptions import ImproperlyConfigured
+from django.core.exceptions import BadRequest, ImproperlyConfigured, ValidationError
 from django.db import transaction
-from django.db.models import QuerySet
-from django.http.response import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse
+from django.db.models import QuerySet, prefetch_related_objects
+from django.http import QueryDict
+from django.http.response import (HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse,
+                                  StreamingHttpResponse)
+from django.template.loader import select_template
 
 try:
     from django.utils.choices import CallableChoiceIterator
 except ImportError:  # Django<5.0
     from django.forms.fields import CallableChoiceIterator
 
-from django.utils.encoding import force_str
+from django.utils.encoding import uri_to_iri
 from django.utils.functional import cached_property
 from django.views.generic.base import ContextMixin, TemplateResponseMixin, View
 from django.views.generic.detail import SingleObjectMixin
 from django.views.generic.edit import FormView as GenericFormView
 
+from formset.choices import ChoiceSource
+from formset.collection import BaseFormCollection, CollectionPlaceholder, LazyModelsList
 from formset.upload import FileUploadMixin
 from formset.widgets import DualSelector, Selectize
 
@@ -29,70 +34,151 @@ class IncompleteSelectResponseMixin:
     """
     def get(self, request, **kwargs):
         if request.accepts('application/json') and 'field' in request.GET:
+            if len(request.GET.getlist('field')) > 1:
+                return self._fetch_many_options(request)
             return self._fetch_options(request)
         return super().get(request, **kwargs)
 
     def _fetch_options(self, request):
-        field_path = request.GET['field']
+        try:
+            data = self._get_options_data(request.GET['field'], request.GET)
+        except BadRequest as exc:
+            return HttpResponseBadRequest(str(exc))
+        return JsonResponse(data)
+
+    def _fetch_many_options(self, request):
+        """
+        Fetch the options of several fields using one request, for instance after loading the page.
+        Parameters addressing only one of these fields are prefixed by its path, for instance
+        ``?field=form.county&field=form.state&form.county:filter-state=NY``.
+        """
+        data = {}
+        for field_path in request.GET.getlist('field'):
+            prefix = f'{field_path}:'
+            params = QueryDict(mutable=True)
+            for key, values in request.GET.lists():
+                if key.startswith(prefix):
+                    params.setlist(key[len(prefix):], values)
+            try:
+                data[field_path] = self._get_options_data(field_path, params)
+            except BadRequest as exc:
+                return HttpResponseBadRequest(str(exc))
+        return JsonResponse(data)
+
+    def _get_options_data(self, field_path, params):
         try:
             field = self.get_field(field_path)
         except (KeyError, ValueError):
-            return HttpResponseBadRequest(f"No such field: {field_path}")
+            raise BadRequest(f"No such field: {field_path}")
         assert isinstance(field.widget, (Selectize, DualSelector))
         widget = field.widget
         try:
-            offset = int(request.GET.get('offset'))
+            offset = int(params.get('offset'))
         except TypeError:
             offset = 0
 
         if isinstance(widget.choices, CallableChoiceIterator):
-            options = [
-                o for index, o in enumerate(widget.choices)
-                if index >= offset and index < offset + widget.max_prefetch_choices
-            ]
-            return JsonResponse({
-                'count': len(options),
-                'incomplete': False,
-                'options': options,
-            })
+            # choices not originating from a queryset, evaluate callables only once per request
+            if choice_source := widget.choice_source:
+                choice_source = choice_source.evaluate()
+            else:
+                choice_source = ChoiceSource(list(widget.choices))
+            return self._get_source_options_data(widget, choice_source, offset, params)
 
         queryset = widget.choices.queryset
-        data = {'total_count': queryset.count()}
-        incomplete = queryset.count() - offset > widget.max_prefetch_choices
+        total_count = widget.count_choices(queryset)
+        data = {'total_count': total_count}
+        if total_count is None:
+            incomplete = None  # unless determined by probing for one more row than required
+        else:
+            incomplete = total_count - offset > widget.max_prefetch_choices
+        probe = widget.count_strategy == 'probe'
 
-        if widget.filter_by and any(k.startswith('filter-') for k in request.GET.keys()):
-            filters = {key: request.GET.getlist(f'filter-{key}') for key in widget.filter_by.keys()}
+        if widget.filter_by and any(k.startswith('filter-') for k in params.keys()):
+            filters = {key: params.getlist(f'filter-{key}') for key in widget.filter_by.keys()}
             data['filters'] = filters
             queryset = queryset.filter(widget.build_filter_query(filters))
-            incomplete = None  # incomplete state unknown
+            incomplete, probe = None, False  # incomplete state unknown
 
-        if pk := request.GET.get('pk'):
-            queryset = queryset.filter(pk=pk)
-            incomplete = None  # incomplete state unknown
-        elif search := request.GET.get('search'):
+        limit = widget.max_prefetch_choices
+        if pks := [pk for value in params.getlist('pk') for pk in value.split(',') if pk]:
+            # answer a batch of lookups, given as repeated or comma separated parameter, using one query
+            if len(pks) > limit:
+                raise BadRequest(f"Too many primary keys for field: {field_path}")
+            try:
+                queryset = queryset.filter(pk__in=pks)
+            except (ValidationError, ValueError):
+                raise BadRequest(f"Invalid primary key for field: {field_path}")
+            offset = 0
+            incomplete, probe = None, False  # incomplete state unknown
+        elif search := params.get('search'):
             data['search'] = search
             queryset = queryset.filter(widget.build_search_query(search))
-            incomplete = None  # incomplete state unknown
+            incomplete, probe = None, False  # incomplete state unknown
 
-        limited_qs = queryset[offset:offset + widget.max_prefetch_choices]
         to_field_name = field.to_field_name if field.to_field_name else 'pk'
-        if widget.group_field_name:
-            options = [{
-                'id': getattr(item, to_field_name),
-                'label': str(item),
-                'optgroup': force_str(getattr(item, widget.group_field_name)),
-            } for item in limited_qs]
+        cursor_ordering = widget.get_cursor_ordering(queryset) if widget.pagination == 'cursor' else None
+        if cursor_ordering:
+            # keyset pagination: seek to the row following the cursor instead of skipping `offset` rows
+            queryset = queryset.order_by(*(f'-{path}' if desc else path for path, desc in cursor_ordering))
+            if cursor := params.get('cursor'):
+                try:
+                    values = widget.decode_cursor(cursor_ordering, cursor)
+                except ValueError:
+                    raise BadRequest(f"Invalid cursor for field: {field_path}")
+                queryset = queryset.filter(widget.build_cursor_query(cursor_ordering, values))
+                offset = 0
+        if widget.uses_projection:
+            extra_fields = [path for path, _descending in cursor_ordering] if cursor_ordering else []
+            queryset = widget.project_options(queryset, to_field_name, extra_fields)
+        elif widget.group_field_name:
+            queryset = widget.select_group_related(queryset)
+        if cursor_ordering or probe:
+            limited_qs = list(queryset[offset:offset + limit + 1])
+            has_more = len(limited_qs) > limit
+            limited_qs = limited_qs[:limit]
+            if cursor_ordering:
+                data['next_cursor'] = widget.encode_cursor(cursor_ordering, limited_qs[-1]) if has_more else None
+            if incomplete is not None or probe:
+                incomplete = has_more
         else:
-            options = [{
-                'id': getattr(item, to_field_name),
-                'label': str(item),
-            } for item in limited_qs]
+            limited_qs = queryset[offset:offset + limit]
+        options = [widget.build_option(item, to_field_name) for item in limited_qs]
         data.update(
             count=len(options),
             incomplete=incomplete,
             options=options,
         )
-        return JsonResponse(data)
+        return data
+
+    def _get_source_options_data(self, widget, choice_source, offset, params):
+        data = {}
+        if pks := [pk for value in params.getlist('pk') for pk in value.split(',') if pk]:
+            if len(pks) > widget.max_prefetch_choices:
+                raise BadRequest("Too many primary keys")
+            options = choice_source.lookup(pks)
+            total_count, incomplete = None, None
+        else:
+            if widget.filter_by and any(k.startswith('filter-') for k in params.keys()):
+                filters = {key: params.getlist(f'filter-{key}') for key in widget.filter_by.keys()}
+                data['filters'] = filters
+                choice_source = choice_source.filter(**{
+                    lookup: filters[key] for key, lookup in widget.filter_by.items()
+                })
+            if search := params.get('search'):
+                data['search'] = search
+                choice_source = choice_source.search(uri_to_iri(search))
+            total_count = choice_source.count()
+            incomplete = total_count - offset > widget.max_prefetch_choices
+            options = choice_source.slice(offset, widget.max_prefetch_choices)
+        options = [{'id': value, 'label': label} for value, label in options]
+        data.update(
+            total_count=total_count,
+            count=len(options),
+            incomplete=incomplete,
+            options=options,
+        )
+        return data
 
 
 class FormsetResponseMixin:
@@ -190,11 +276,18 @@ class FormCollectionViewMixin(FormsetResponseMixin):
     success_url = None
     initial = {}
     collection_kwargs = None
+    streaming = False
 
     def get(self, request, *args, **kwargs):
         if request.accepts('application/json') and set(['path', 'pk']).issubset(request.GET):
             # invoked by `DjangoFormset.prefillPartial()`
             return self._fetch_partial_data()
+        if 'sibling' in request.GET:
+            # invoked by `DjangoFormCollectionTemplate.fetchSiblingTemplate()`
+            return self._render_extra_sibling()
+        if 'siblings_offset' in request.GET:
+            # invoked by `DjangoFormset.loadSiblings()`
+            return self._render_siblings_window()
         # instantiate blank versions of the forms in the collection
         return self.render_to_response(self.get_context_data())
 
@@ -238,6 +331,35 @@ class FormCollectionViewMixin(FormsetResponseMixin):
                 return JsonResponse(initial)
         return HttpResponseBadRequest("Invalid path value")
 
+    def _render_extra_sibling(self):
+        form_collection = self.get_form_collection()
+        holder = form_collection
+        path = self.request.GET['sibling']
+        for part in path.split('.'):
+            if part.isdigit():
+                continue
+            if not (holder := getattr(holder, 'declared_holders', {}).get(part)):
+                break
+        if not getattr(holder, 'has_many', False):
+            return HttpResponseBadRequest("Invalid sibling path")
+        position = self.request.GET.get('position')
+        if position is not None:
+            if not position.isdigit():
+                return HttpResponseBadRequest("Invalid sibling position")
+            position = int(position)
+        holder = holder.replicate(prefix=None if path == '0' else path, renderer=form_collection.renderer)
+        return HttpResponse(holder.render_extra_sibling(position, form_collection.renderer))
+
+    def _render_siblings_window(self):
+        form_collection = self.get_form_collection()
+        if not (form_collection.has_many and form_collection.siblings_window):
+            return HttpResponseBadRequest("Collection does not render its siblings in windows")
+        offset = self.request.GET['siblings_offset']
+        if not offset.isdigit():
+            return HttpResponseBadRequest("Invalid siblings offset")
+        form_collection.window_offset = int(offset)
+        return HttpResponse(form_collection.render_siblings_window())
+
     def _delete_partial(self):
         collection_class = self.get_collection_class()
         empty_holder = collection_class
@@ -259,9 +381,30 @@ class FormCollectionViewMixin(FormsetResponseMixin):
         context['form_collection'] = self.get_form_collection()
         return context
 
+    def render_to_response(self, context, **response_kwargs):
+        """
+        If ``streaming`` is set, respond with a ``StreamingHttpResponse``, which sends the page up to the
+        form collection immediately and then each sibling of that collection as soon as it is rendered.
+        """
+        if not self.streaming or not isinstance(context.get('form_collection'), BaseFormCollection):
+            return super().render_to_response(context, **response_kwargs)
+        form_collection = context['form_collection']
+        context['form_collection'] = placeholder = CollectionPlaceholder(form_collection)
+        # the page itself is rendered beforehand, since it may have side effects such as setting the CSRF cookie
+        html = select_template(self.get_template_names()).render(context, self.request)
+        head, marker, tail = html.partition(placeholder.marker)
+
+        def stream():
+            yield head
+            if marker:
+                yield from form_collection.render_iter()
+                yield tail
+
+        response_kwargs.setdefault('content_type', self.content_type)
+        return StreamingHttpResponse(stream(), **response_kwargs)
+
     def get_field(self, field_path):
-        collection_class = self.get_collection_class()
-        return collection_class().get_field(field_path)
+        return self.get_collection_class().get_field(field_path)
 
     def get_collection_kwargs(self):
         kwargs = {
@@ -280,6 +423,11 @@ class FormCollectionViewMixin(FormsetResponseMixin):
             kwargs.update(data=body.get('formset_data'))
             if callable(getattr(self, 'get_object', None)):
                 kwargs.update(instance=self.get_object())
+            form_collection = collection_class(**kwargs)
+            if isinstance(siblings_offset := body.get('siblings_offset'), int) and siblings_offset >= 0:
+                # the client did not load the windows of siblings starting at this offset
+                form_collection.loaded_siblings = siblings_offset
+            return form_collection
         return collection_class(**kwargs)
 
     def get_collection_class(self):
@@ -321,8 +469,10 @@ class EditCollectionView(IncompleteSelectResponseMixin, FileUploadMixin, FormCol
     def get_initial(self):
         initial = super().get_initial()
         if isinstance(initial, dict) and self.object:
-            collection_class = self.get_collection_class()
-            initial.update(collection_class().model_to_dict(self.object))
+            collection = self.get_collection_class()()
+            if self.object.pk is not None:
+                prefetch_related_objects([self.object], *collection.get_prefetch_lookups(type(self.object)))
+            initial.update(collection.model_to_dict(self.object))
         return initial
 
     def form_collection_valid(self, form_collection):
@@ -369,6 +519,9 @@ class BulkEditCollectionView(IncompleteSelectResponseMixin, FileUploadMixin, For
     def get_initial(self):
         collection_class = self.get_collection_class()
         queryset = self.get_queryset()
+        if collection_class.siblings_window:
+            # convert only the objects of the rendered window or of the submitted siblings
+            return LazyModelsList(collection_class(), queryset)
         initial = collection_class().models_to_list(queryset)
         return initial
 
@@ -1,26 +1,32 @@
+import hashlib
+import json
 import os
 import struct
-from base64 import b16encode
+from base64 import b16encode, urlsafe_b64decode, urlsafe_b64encode
 from datetime import date, timedelta, timezone
-from functools import reduce
+from functools import partial, reduce
 from operator import and_, or_
 from pathlib import Path
 
-from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist, ImproperlyConfigured
 from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import UploadedFile
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.signing import get_cookie_signer
+from django.db.models.constants import LOOKUP_SEP
 from django.db.models.query_utils import Q
 from django.forms.models import ModelChoiceIterator, ModelChoiceIteratorValue
 from django.forms.widgets import (FILE_INPUT_CONTRADICTION, DateTimeBaseInput, FileInput, Select, SelectMultiple,
                                   TextInput, Widget)
 from django.template.loader import get_template
-from django.utils.encoding import uri_to_iri
+from django.utils.encoding import force_str, uri_to_iri
 from django.utils.functional import cached_property
 from django.utils.timezone import datetime, now
 from django.utils.translation import gettext_lazy as _
 
 from formset.calendar import CalendarRenderer
+from formset.choices import count_queryset, get_choice_source, iterate_queryset
 
 
 class Button(Widget):
@@ -68,21 +74,31 @@ class Button(Widget):
 
 
 class SimpleModelChoiceIterator(ModelChoiceIterator):
+    limit = None  # widgets not loading the complete set of choices, iterate only over the first objects
+
     def __iter__(self):
-        queryset = self.queryset
-        # Can't use iterator() when queryset uses prefetch_related()
-        if not queryset._prefetch_related_lookups:
-            queryset = queryset.iterator()
-        for obj in queryset:
+        for obj in iterate_queryset(self.queryset, self.limit):
             yield self.choice(obj)
 
     def __len__(self):
-        return self.queryset.count()
+        return count_queryset(self.queryset)
 
     def __bool__(self):
         return self.queryset.exists()
 
 
+def get_path_value(obj, path):
+    """
+    Return the value of an attribute of the given object, following the relations of a path
+    separated by double underscores, such as ``state__country``.
+    """
+    for name in path.split(LOOKUP_SEP):
+        if obj is None:
+            break
+        obj = getattr(obj, name)
+    return obj
+
+
 class GroupedModelChoiceIterator(SimpleModelChoiceIterator):
     group_field_name = None
 
@@ -90,7 +106,7 @@ class GroupedModelChoiceIterator(SimpleModelChoiceIterator):
         return (
             ModelChoiceIteratorValue(self.field.prepare_value(obj), obj),
             self.field.label_from_instance(obj),
-            getattr(obj, self.group_field_name),
+            get_path_value(obj, self.group_field_name),
         )
 
 
@@ -104,8 +120,18 @@ class IncompleteSelectMixin:
     search_lookup = None
     group_field_name = None
     filter_by = None
-
-    def __init__(self, attrs=None, choices=(), search_lookup=None, group_field_name=None, filter_by=None):
+    pagination = 'offset'  # or 'cursor' for keyset pagination
+    count_strategy = 'exact'  # or 'cached', 'probe', 'disabled'
+    count_cache_alias = 'default'
+    count_cache_timeout = 300
+    label_fields = None
+    label_format = None
+    label_expression = None
+    group_label_field = None
+
+    def __init__(self, attrs=None, choices=(), search_lookup=None, group_field_name=None, filter_by=None,
+                 pagination=None, count_strategy=None, count_cache_timeout=None, label_fields=None,
+                 label_format=None, label_expression=None, group_label_field=None):
         if search_lookup:
             self.search_lookup = search_lookup
         if isinstance(self.search_lookup, str):
@@ -114,6 +140,26 @@ class IncompleteSelectMixin:
             self.group_field_name = group_field_name
         if isinstance(filter_by, dict):
             self.filter_by = filter_by
+        if pagination is not None:
+            self.pagination = pagination
+        if self.pagination not in ['offset', 'cursor']:
+            raise ImproperlyConfigured(f"Invalid attribute 'pagination' in {self.__class__}.")
+        if count_strategy is not None:
+            self.count_strategy = count_strategy
+        if self.count_strategy not in ['exact', 'cached', 'probe', 'disabled']:
+            raise ImproperlyConfigured(f"Invalid attribute 'count_strategy' in {self.__class__}.")
+        if count_cache_timeout is not None:
+            self.count_cache_timeout = count_cache_timeout
+        if label_fields:
+            self.label_fields = label_fields
+        if isinstance(self.label_fields, str):
+            self.label_fields = [self.label_fields]
+        if label_format is not None:
+            self.label_format = label_format
+        if label_expression is not None:
+            self.label_expression = label_expression
+        if isinstance(group_label_field, str):
+            self.group_label_field = group_label_field
         super().__init__(attrs, choices)
 
     def build_filter_query(self, filters):
@@ -137,6 +183,231 @@ class IncompleteSelectMixin:
         except TypeError:
             raise ImproperlyConfigured(f"Invalid attribute 'search_lookup' in {self.__class__}.")
 
+    @property
+    def uses_projection(self):
+        """
+        Returns True if the options fetched by the client shall be built from a projection of
+        the queryset, rather than from model instances.
+        """
+        return bool(self.label_fields) or self.label_expression is not None
+
+    def project_options(self, queryset, to_field_name, extra_fields=()):
+        """
+        Restrict the queryset to the values required to build the options, so that rows are
+        fetched as dictionaries without instantiating any model object.
+        """
+        fields = [to_field_name, *(self.label_fields or [])]
+        if self.group_field_name:
+            if self.group_label_field:
+                fields.append(self.group_label_field)
+            else:
+                related_fields = self.get_group_path_fields(queryset.model)
+                if related_fields and related_fields[-1].is_relation:
+                    raise ImproperlyConfigured(
+                        f"{self.__class__} requires attribute 'group_label_field' to project the label of "
+                        f"related field '{self.group_field_name}'."
+                    )
+                fields.append(self.group_field_name)
+        fields.extend(extra_fields)
+        expressions = {}
+        if self.label_expression is not None:
+            expressions['_option_label'] = self.label_expression
+        return queryset.values(*dict.fromkeys(fields), **expressions)
+
+    def build_option(self, item, to_field_name):
+        """
+        Build the option as sent to the client from a model instance or a projected row.
+        """
+        if isinstance(item, dict):
+            if self.label_expression is not None:
+                label = item['_option_label']
+            else:
+                values = [item[field] for field in self.label_fields]
+                if self.label_format is None:
+                    label = ' '.join(str(value) for value in values)
+                else:
+                    label = self.label_format.format(*values, **item)
+            option = {'id': item[to_field_name], 'label': label}
+            if self.group_field_name:
+                option['optgroup'] = force_str(item[self.group_label_field or self.group_field_name])
+        else:
+            option = {'id': getattr(item, to_field_name), 'label': str(item)}
+            if self.group_field_name:
+                option['optgroup'] = force_str(get_path_value(item, self.group_field_name))
+        return option
+
+    def get_group_path_fields(self, model):
+        """
+        Return the model fields traversed by ``group_field_name``, which may span relations, such as
+        ``state__country``. The list stops at the first name not resolving to a model field.
+        """
+        fields = []
+        for name in self.group_field_name.split(LOOKUP_SEP):
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                break
+            fields.append(field)
+            if not field.is_relation:
+                break
+            model = field.related_model
+        return fields
+
+    def select_group_related(self, queryset):
+        """
+        If ``group_field_name`` refers to related objects, fetch those objects in the same query,
+        rather than in one extra query per option. Each step of the path must be a forward foreign
+        key or one-to-one relation.
+        """
+        related_names = []
+        for field in self.get_group_path_fields(queryset.model):
+            if not ((field.many_to_one or field.one_to_one) and field.concrete):
+                break
+            related_names.append(field.name)
+        if related_names:
+            return queryset.select_related(LOOKUP_SEP.join(related_names))
+        return queryset
+
+    def count_choices(self, queryset):
+        """
+        Return the number of choices in the given queryset according to the configured
+        ``count_strategy``. Returns ``None`` if counting has been disabled or is replaced by probing.
+        """
+        if self.count_strategy == 'exact':
+            return count_queryset(queryset)
+        if self.count_strategy == 'cached':
+            try:
+                sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+            except EmptyResultSet:
+                return 0
+            digest = hashlib.md5(f'{sql}:{params}'.encode(), usedforsecurity=False).hexdigest()
+            cache_key = f'formset:count:{queryset.model._meta.label_lower}:{digest}'
+            cache = caches[self.count_cache_alias]
+            count = cache.get(cache_key)
+            if count is None:
+                count = queryset.count()
+                cache.set(cache_key, count, self.count_cache_timeout)
+            return count
+
+    def is_incomplete(self, queryset):
+        """
+        Return True if the given queryset contains more choices than the widget shall prefetch.
+        """
+        if self.count_strategy == 'probe':
+            return queryset[self.max_prefetch_choices:self.max_prefetch_choices + 1].exists()
+        count = self.count_choices(queryset)
+        if count is None:
+            return True  # without counting, assume the worst
+        return count > self.max_prefetch_choices
+
+    def get_cursor_ordering(self, queryset):
+        """
+        Return the ordering of the given queryset as a list of ``(field_path, descending)`` tuples,
+        terminated by the primary key as tiebreaker. Returns ``None`` if that ordering can not be
+        used for keyset pagination, for instance if it contains expressions, nullable fields or
+        relations yielding more than one row per object.
+        """
+        query = queryset.query
+        if query.extra_order_by:
+            return
+        if query.order_by:
+            ordering = query.order_by
+        elif query.default_ordering:
+            ordering = query.get_meta().ordering
+        else:
+            ordering = []
+        cursor_ordering = []
+        for term in ordering:
+            if not isinstance(term, str) or term == '?':
+                return
+            resolved = self._resolve_ordering_term(queryset.model, term.lstrip('-'), term.startswith('-'))
+            if resolved is None:
+                return
+            cursor_ordering.extend(resolved)
+        pk_paths = ['pk', queryset.model._meta.pk.name, queryset.model._meta.pk.attname]
+        if not any(path in pk_paths for path, _descending in cursor_ordering):
+            cursor_ordering.append(('pk', False))
+        return cursor_ordering
+
+    def _resolve_ordering_term(self, model, name, descending, prefix='', depth=0):
+        if depth > 5:
+            return  # probably a cyclic default ordering
+        if name == 'pk':
+            return [(f'{prefix}pk', descending)]
+        opts, parts = model._meta, name.split('__')
+        for part in parts[:-1]:
+            try:
+                field = opts.get_field(part)
+            except FieldDoesNotExist:
+                return  # ordering by annotation
+            if not (field.many_to_one or field.one_to_one) or field.null or not field.concrete:
+                return
+            opts = field.related_model._meta
+        try:
+            field = opts.get_field(parts[-1])
+        except FieldDoesNotExist:
+            return
+        if not field.concrete or field.null or field.many_to_many:
+            return
+        path = prefix + name
+        if field.is_relation and parts[-1] == field.name and field.related_model._meta.ordering:
+            # ordering by a foreign key applies the default ordering of the related model
+            resolved = []
+            for term in field.related_model._meta.ordering:
+                if not isinstance(term, str):
+                    return
+                related = self._resolve_ordering_term(
+                    field.related_model,
+                    term.lstrip('-'),
+                    descending != term.startswith('-'),
+                    f'{path}__',
+                    depth + 1,
+                )
+                if related is None:
+                    return
+                resolved.extend(related)
+            return resolved
+        if field.is_relation:
+            path = prefix + '__'.join(parts[:-1] + [field.attname])
+        return [(path, descending)]
+
+    def build_cursor_query(self, cursor_ordering, values):
+        """
+        Build the seek condition ``(key_1, …, key_n, pk) > (value_1, …, value_n, pk)`` as nested
+        Q-objects, which also works for mixed ascending and descending orderings.
+        """
+        query, equal = Q(), Q()
+        for (path, descending), value in zip(cursor_ordering, values):
+            lookup = f'{path}__lt' if descending else f'{path}__gt'
+            query |= equal & Q(**{lookup: value})
+            equal &= Q(**{path: value})
+        return query
+
+    def encode_cursor(self, cursor_ordering, obj):
+        values = []
+        for path, _descending in cursor_ordering:
+            if isinstance(obj, dict):
+                value = obj[path]
+            else:
+                value = obj
+                for part in path.split('__'):
+                    value = getattr(value, part)
+            values.append(value)
+        return urlsafe_b64encode(json.dumps(values, cls=DjangoJSONEncoder).encode()).decode()
+
+    def decode_cursor(self, cursor_ordering, cursor):
+        """
+        Decode an opaque cursor as generated by method ``encode_cursor()``. Raises a ``ValueError``
+        if the cursor has been tampered with.
+        """
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()))
+        except (TypeError, ValueError) as error:
+            raise ValueError(f"Invalid cursor: {cursor}") from error
+        if not isinstance(values, list) or len(values) != len(cursor_ordering):
+            raise ValueError(f"Invalid cursor: {cursor}")
+        return values
+
     def format_value(self, value):
         if value is None:
             return []
@@ -147,23 +418,44 @@ class IncompleteSelectMixin:
     def build_attrs(self, base_attrs, extra_attrs):
         attrs = super().build_attrs(base_attrs, extra_attrs)
         if isinstance(self.choices, SimpleModelChoiceIterator):
-            if self.choices.queryset.count() > self.max_prefetch_choices:
-                attrs['incomplete'] = True
-            if self.filter_by:
-                attrs['filter-by'] = ','.join(self.filter_by.keys())
-                # attrs['incomplete'] = True
+            incomplete = self.is_incomplete(self.choices.queryset)
+        elif self.choice_source:
+            incomplete = attrs.get('incomplete')  # determined by get_context() on the evaluated source
+        else:
+            return attrs
+        if incomplete:
+            attrs['incomplete'] = True
+        if self.filter_by:
+            attrs['filter-by'] = ','.join(self.filter_by.keys())
+            # attrs['incomplete'] = True
         return attrs
 
+    @property
+    def choice_source(self):
+        """
+        The :class:`formset.choices.ChoiceSource` providing the choices for this widget, if any.
+        """
+        return get_choice_source(self.choices)
+
     def get_context(self, name, value, attrs):
         if isinstance(self.choices, ModelChoiceIterator):
             if self.group_field_name:
                 self.optgroups = self._optgroups_model_choice
-                self.choices.queryset = self.choices.queryset.order_by(self.group_field_name)
+                queryset = self.choices.queryset.order_by(self.group_field_name)
+                self.choices.queryset = self.select_group_related(queryset)
                 self.choices.group_field_name = self.group_field_name
                 self.choices.__class__ = GroupedModelChoiceIterator
             else:
                 self.optgroups = self._options_model_choice
                 self.choices.__class__ = SimpleModelChoiceIterator
+            # siblings share the same slice of choices, selected values beyond are fetched separately
+            self.choices.limit = self.max_prefetch_choices
+        elif choice_source := self.choice_source:
+            # a callable providing the choices is invoked only once while rendering
+            choice_source = choice_source.evaluate()
+            if choice_source.count() > self.max_prefetch_choices:
+                attrs = dict(attrs or {}, incomplete=True)
+            self.optgroups = partial(self._options_choice_source, choice_source)
         else:
             self.optgroups = self._optgroups_static_choice
         context = super().get_context(name, value, attrs)
@@ -173,6 +465,30 @@ class IncompleteSelectMixin:
         optgroups = super().optgroups(name, values, attrs)
         return optgroups
 
+    def _fetch_selected_objects(self, values_list):
+        """
+        Fetch the model instances for all selected values using one single query. Returns a
+        dictionary mapping the stringified primary keys onto their instances.
+        """
+        if not (pks := [val for val in values_list if val]):
+            return {}
+        return {str(pk): obj for pk, obj in self.choices.queryset.in_bulk(pks).items()}
+
+    def _options_choice_source(self, choice_source, name, values, attrs=None):
+        values_list = [str(val) for val in values if val]
+        optgroups = []
+        # selected choices come first, in the order of their values
+        selected_labels = {}
+        if values_list:
+            selected_labels = {str(val): label for val, label in choice_source.lookup(values_list)}
+        for val in values_list:
+            if (label := selected_labels.get(val)) is not None:
+                optgroups.append((None, [{'value': val, 'label': label, 'selected': True}], len(optgroups)))
+        for val, label in choice_source.slice(0, self.max_prefetch_choices):
+            if str(val) not in selected_labels:
+                optgroups.append((None, [{'value': str(val), 'label': label, 'selected': False}], len(optgroups)))
+        return optgroups
+
     def _options_model_choice(self, name, values, attrs=None):
         values_list = [str(val) for val in values]
         optgroups, counter = [], 0
@@ -186,10 +502,11 @@ class IncompleteSelectMixin:
                 values_list.remove(val)
             optgroups.append((None, [{'value': val, 'label': label, 'selected': selected}], counter))
             counter += 1
+        selected_objects = self._fetch_selected_objects(values_list)
         for val in values_list:
             try:
-                obj = self.choices.queryset.get(pk=val)
-            except ObjectDoesNotExist:
+                obj = selected_objects[val]
+            except KeyError:
                 continue
             label = self.choices.field.label_from_instance(obj)
             optgroups.append((None, [{'value': str(val), 'label': label, 'selected': True}], counter))
@@ -201,18 +518,19 @@ class IncompleteSelectMixin:
         optgroups, prev_group_name, counter = [], '-', 0
 
         # first handle selected values
+        selected_objects = self._fetch_selected_objects(values_list)
+        selected_subgroups = {}  # maps group names onto the subgroups of selected options
         for counter, val in enumerate(values_list, counter):
             try:
-                obj = self.choices.queryset.get(pk=val)
-            except ObjectDoesNotExist:
+                obj = selected_objects[val]
+            except KeyError:
                 continue
             label = self.choices.field.label_from_instance(obj)
-            group_name = getattr(obj, self.group_field_name) if self.group_field_name else None
-            optgroup = list(filter(lambda item: item[0] == group_name, optgroups))
-            if optgroup:
-                optgroup[-1][1].append({'value': str(val), 'label': label, 'selected': True})
+            group_name = get_path_value(obj, self.group_field_name) if self.group_field_name else None
+            if group_name in selected_subgroups:
+                selected_subgroups[group_name].append({'value': str(val), 'label': label, 'selected': True})
             else:
-                subgroup = [{'value': str(val), 'label': label, 'selected': True}]
+                subgroup = selected_subgroups[group_name] = [{'value': str(val), 'label': label, 'selected': True}]
                 optgroups.append((group_name, subgroup, counter))
 
         # afterwards handle the remaining values
@@ -239,8 +557,9 @@ class Selectize(IncompleteSelectMixin, Select):
     webcomponent = 'django-selectize'
     placeholder = _("Select")
 
-    def __init__(self, attrs=None, choices=(), search_lookup=None, group_field_name=None, filter_by=None, placeholder=None):
-        super().__init__(attrs, choices, search_lookup, group_field_name, filter_by)
+    def __init__(self, attrs=None, choices=(), search_lookup=None, group_field_name=None, filter_by=None,
+                 placeholder=None, **kwargs):
+        super().__init__(attrs, choices, search_lookup, group_field_name, filter_by, **kwargs)
         if placeholder is not None:
             self.placeholder = placeholder
 
@@ -313,10 +632,11 @@ class DualSortableSelector(DualSelector):
         values_list = [str(val) for val in values]
         optgroups, counter = [], 0
         # first create options from values_list, otherwise order is lost
+        selected_objects = self._fetch_selected_objects(values_list)
         for val in values_list:
             try:
-                obj = self.choices.queryset.get(pk=val)
-            except ObjectDoesNotExist:
+                obj = selected_objects[val]
+            except KeyError:
                 continue
             label = self.choices.field.label_from_instance(obj)
             optgroups.append((None, [{'value': str(val), 'label': label, 'selected': True}], counter))
@@ -7,6 +7,19 @@ from formset.collection import FormCollection
 from testapp.models.company import Company, Department, Team
 
 
+def get_ids(rows, name):
+	"""
+	Return the primary keys submitted through the hidden field ``id`` of the named form of each row.
+	"""
+	ids = []
+	for data in rows:
+		try:
+			ids.append(int(data[name]['id']))
+		except (KeyError, TypeError, ValueError):
+			pass
+	return ids
+
+
 class TeamForm(ModelForm):
 	id = fields.IntegerField(
 		required=False,
@@ -26,11 +39,18 @@ class TeamCollection(FormCollection):
 	add_label = "Add Team"
 	related_field = 'department'
 
+	def retrieve_instances(self, rows):
+		try:
+			self.teams = self.instance.teams.in_bulk(get_ids(rows, 'team'))
+		except (AttributeError, ValueError):
+			self.teams = {}
+		return super().retrieve_instances(rows)
+
 	def retrieve_instance(self, data):
 		if data := data.get('team'):
 			try:
-				return self.instance.teams.get(id=data.get('id') or 0)
-			except (AttributeError, Team.DoesNotExist, ValueError):
+				return self.teams[int(data.get('id'))]
+			except (KeyError, TypeError, ValueError):
 				return Team(name=data.get('name'), department=self.instance)
 
 
@@ -54,11 +74,18 @@ class DepartmentCollection(FormCollection):
 	add_label = "Add Department"
 	related_field = 'company'
 
+	def retrieve_instances(self, rows):
+		try:
+			self.departments = self.instance.departments.in_bulk(get_ids(rows, 'department'))
+		except (AttributeError, ValueError):
+			self.departments = {}
+		return super().retrieve_instances(rows)
+
 	def retrieve_instance(self, data):
 		if data := data.get('department'):
 			try:
-				return self.instance.departments.get(id=data.get('id') or 0)
-			except (AttributeError, Department.DoesNotExist, ValueError):
+				return self.departments[int(data.get('id'))]
+			except (KeyError, TypeError, ValueError):
 				return Department(name=data.get('name'), company=self.instance)
 
 
@@ -93,11 +120,15 @@ class CompaniesCollection(FormCollection):
 	legend = "Company"
 	add_label = "Add Company"
 
+	def retrieve_instances(self, rows):
+		self.companies = Company.objects.in_bulk(get_ids(rows, 'company'))
+		return super().retrieve_instances(rows)
+
 	def retrieve_instance(self, data):
 		if data := data.get('company'):
 			try:
-				return Company.objects.get(id=data.get('id') or 0)
-			except Company.DoesNotExist:
+				return self.companies[int(data.get('id'))]
+			except (KeyError, TypeError, ValueError):
 				return Company(name=data.get('name'))
 
 class CompanyDepartmentFormset(FormCollection):
@@ -0,0 +1,55 @@
+"""
+Benchmarks for rendering large forms and widgets. Each benchmark asserts on the number of
+database queries and on an upper bound for the elapsed time. These bounds are generous enough
+for slow CI runners, hence they only catch regressions in the order of magnitude.
+"""
+from time import perf_counter
+
+import pytest
+
+from django.db import connection
+from django.forms import Form, fields, models
+from django.test.utils import CaptureQueriesContext
+
+from formset.renderers.bootstrap import FormRenderer
+from formset.utils import FormMixin
+from formset.widgets import DualSelector, SelectizeMultiple
+
+from testapp.models import County, State
+
+
+@pytest.fixture
+def grouped_counties(db):
+    states = State.objects.bulk_create(State(code=f'{n:03}', name=f"State {n:03}") for n in range(500))
+    County.objects.bulk_create(
+        County(state=state, name=f"County {n:02}") for state in states for n in range(20)
+    )
+    return County.objects.filter(state__in=states)
+
+
+@pytest.mark.parametrize('widget_class', [SelectizeMultiple, DualSelector])
+def test_optgroups_10k_options_in_500_groups(grouped_counties, widget_class):
+    widget = widget_class(group_field_name='state')
+    widget.max_prefetch_choices = 10000
+    field = models.ModelMultipleChoiceField(queryset=grouped_counties, widget=widget)
+    selected = list(grouped_counties.order_by('?').values_list('pk', flat=True)[:500])
+    start = perf_counter()
+    with CaptureQueriesContext(connection) as context:
+        html = field.widget.render('counties', selected)
+    elapsed = perf_counter() - start
+    assert html.count('<optgroup') >= 500
+    assert len(context.captured_queries) <= 3
+    assert elapsed < 5.0
+
+
+def test_render_100_fields_and_1000_options():
+    form_fields = {f'field_{n:03}': fields.CharField(label=f"Field {n}") for n in range(100)}
+    form_fields['choice'] = fields.ChoiceField(choices=[(n, f"Choice {n}") for n in range(1000)])
+    form = type('LargeForm', (FormMixin, Form), form_fields)(renderer=FormRenderer())
+    form.render()  # warm up the template cache
+    start = perf_counter()
+    html = form.render()
+    elapsed = perf_counter() - start
+    assert html.count('class="form-control"') == 100
+    assert html.count('<option value=') == 1000
+    assert elapsed < 2.0
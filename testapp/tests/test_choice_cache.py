@@ -0,0 +1,123 @@
+import pytest
+
+from django.db import connection
+from django.forms import Form, models
+from django.test.utils import CaptureQueriesContext
+
+from formset.choices import CachedModelChoiceFieldMixin, CachedModelMultipleChoiceFieldMixin, ChoiceCache
+from formset.collection import FormCollection
+from formset.widgets import Selectize, SelectizeMultiple
+
+from testapp.models import County, State
+
+
+@pytest.fixture
+def counties(db):
+    state = State.objects.create(code='XA', name="Xanadu")
+    for number in range(7):
+        County.objects.create(state=state, name=f"County {number}")
+    return County.objects.filter(state=state).select_related('state')
+
+
+def get_collection_class(queryset, widget):
+    form_class = type('CountyForm', (Form,), {
+        'county': models.ModelChoiceField(queryset=queryset),
+        'neighbour': models.ModelChoiceField(queryset=queryset, widget=widget),
+    })
+    return type('CountyCollection', (FormCollection,), {
+        'extra_siblings': 0,
+        'county': form_class(),
+    })
+
+
+def test_siblings_share_choices(counties):
+    collection_class = get_collection_class(counties, Selectize())
+    num_queries = []
+    for num_siblings in [1, 10]:
+        initial = [{'county': {'county': counties[0].pk}}] * num_siblings
+        collection = collection_class(initial=initial)
+        with CaptureQueriesContext(connection) as context:
+            html = collection.render()
+        num_queries.append(len(context.captured_queries))
+        assert html.count('<option value="{}" selected'.format(counties[0].pk)) == num_siblings
+    assert num_queries[0] == num_queries[1]
+
+
+def test_choice_cache(counties):
+    choice_cache = ChoiceCache()
+    with CaptureQueriesContext(connection) as context:
+        assert choice_cache.count(counties) == 7
+        assert choice_cache.fetch(counties) is choice_cache.fetch(counties.all())
+        assert choice_cache.count(counties.all()) == 7
+    assert len(context.captured_queries) == 2
+    assert choice_cache.fetch(counties.none()) == []
+    choice_cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        choice_cache.fetch(counties)
+    assert len(context.captured_queries) == 1
+
+
+def test_siblings_share_chosen_objects(counties):
+    collection_class = type('CountiesCollection', (get_collection_class(counties, Selectize()),), {
+        'others': type('OthersForm', (Form,), {
+            'counties': models.ModelMultipleChoiceField(queryset=counties.all()),
+        })(),
+    })
+    declared_holders = collection_class.declared_holders
+    assert isinstance(declared_holders['county'].fields['neighbour'], CachedModelChoiceFieldMixin)
+    assert isinstance(declared_holders['others'].fields['counties'], CachedModelMultipleChoiceFieldMixin)
+    field_classes = [type(field) for holder in declared_holders.values() for field in holder.fields.values()]
+    num_queries = []
+    for num_siblings in [1, 10]:
+        data = [{
+            'county': {'county': counties[n % 7].pk, 'neighbour': str(counties[(n + 1) % 7].pk)},
+            'others': {'counties': [counties[n % 7].pk, counties[(n + 2) % 7].pk]},
+        } for n in range(num_siblings)]
+        collection = collection_class(data=data)
+        with CaptureQueriesContext(connection) as context:
+            assert collection.is_valid()
+        num_queries.append(len(context.captured_queries))
+        cleaned_data = collection.valid_holders[-1]
+        n = num_siblings - 1
+        assert cleaned_data['county'].cleaned_data['neighbour'] == counties[(n + 1) % 7]
+        assert set(cleaned_data['others'].cleaned_data['counties']) == {counties[n % 7], counties[(n + 2) % 7]}
+    assert num_queries[1] <= num_queries[0] <= 3  # at most one query per choice field
+    # validating does not replace the classes of the fields shared by the siblings
+    assert [type(field) for holder in declared_holders.values() for field in holder.fields.values()] == field_classes
+
+    data = [{'county': {'county': 0, 'neighbour': counties[0].pk}, 'others': {'counties': [counties[0].pk, 0]}}]
+    collection = collection_class(data=data)
+    assert not collection.is_valid()
+    assert collection.errors[0]['county']['county'][0].startswith("Select a valid choice.")
+    assert collection.errors[0]['others']['counties'][0].startswith("Select a valid choice.")
+
+
+def test_choice_cache_limit(counties):
+    choice_cache = ChoiceCache()
+    with CaptureQueriesContext(connection) as context:
+        assert len(choice_cache.fetch(counties, 3)) == 3
+        assert len(choice_cache.fetch(counties, 3)) == 3
+    assert len(context.captured_queries) == 1
+    assert 'LIMIT 3' in context.captured_queries[0]['sql']
+    choice_cache.fetch(counties)
+    with CaptureQueriesContext(connection) as context:
+        assert len(choice_cache.fetch(counties, 5)) == 5
+    assert len(context.captured_queries) == 0
+
+
+def test_siblings_fetch_limited_choices(counties):
+    widget = SelectizeMultiple()
+    widget.max_prefetch_choices = 2
+    form_class = type('CountyForm', (Form,), {
+        'neighbours': models.ModelMultipleChoiceField(queryset=counties, widget=widget),
+    })
+    collection_class = type('CountyCollection', (FormCollection,), {'extra_siblings': 0, 'county': form_class()})
+    pks = [county.pk for county in counties]
+    collection = collection_class(initial=[{'county': {'neighbours': pks[:n]}} for n in (0, 1, 4)])
+    with CaptureQueriesContext(connection) as context:
+        html = collection.render()
+    queries = [query['sql'] for query in context.captured_queries if 'LIMIT' in query['sql']]
+    assert len(queries) == 1
+    assert 'LIMIT 2' in queries[0]  # the same slice of choices for siblings with any number of selected values
+    for county in counties[:4]:
+        assert f'<option value="{county.pk}" selected>{county}</option>' in html
@@ -0,0 +1,342 @@
+import json
+
+import pytest
+
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import connection
+from django.db.models import Value
+from django.db.models.functions import Concat
+from django.forms import ChoiceField, Form, MultipleChoiceField, models
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from formset import fields
+from formset.choices import ChoiceSource
+from formset.views import FormView
+from formset.widgets import DualSelector, DualSortableSelector, Selectize, SelectizeMultiple
+
+from testapp.models import County, State
+
+
+@pytest.fixture
+def counties(db):
+    for code, name in [('XA', "Xanadu A"), ('XB', "Xanadu B"), ('XC', "Xanadu C")]:
+        state = State.objects.create(code=code, name=name)
+        for number in range(7):
+            County.objects.create(state=state, name=f"County {number}")
+    return County.objects.filter(state__code__startswith='X')
+
+
+def get_response(widget, queryset, **params):
+    widget.max_prefetch_choices = 5
+    form_class = type('CountyForm', (Form,), {
+        'county': models.ModelChoiceField(queryset=queryset, widget=widget),
+    })
+    view = FormView.as_view(form_class=form_class, template_name='testapp/native-form.html')
+    request = RequestFactory().get('/', {'field': 'county', **params}, HTTP_ACCEPT='application/json')
+    return view(request)
+
+
+def fetch_options(widget, queryset, **params):
+    response = get_response(widget, queryset, **params)
+    assert response.status_code == 200
+    return json.loads(response.content)
+
+
+def fetch_all_options(widget, queryset):
+    collected, params = [], {}
+    while True:
+        data = fetch_options(widget, queryset, **params)
+        collected.extend(option['id'] for option in data['options'])
+        if not data['next_cursor']:
+            assert data['incomplete'] is False
+            return collected
+        assert data['incomplete'] is True
+        params['cursor'] = data['next_cursor']
+
+
+@pytest.mark.parametrize('widget_class', [Selectize, DualSelector])
+def test_cursor_pagination(counties, widget_class):
+    widget = widget_class(search_lookup='name__icontains', pagination='cursor')
+    assert fetch_all_options(widget, counties) == [county.pk for county in counties]
+
+
+def test_cursor_pagination_with_search(counties):
+    widget = Selectize(search_lookup='name__icontains', pagination='cursor')
+    data = fetch_options(widget, counties, search="County 3")
+    assert [option['label'] for option in data['options']] == ["County 3 (XA)", "County 3 (XB)", "County 3 (XC)"]
+    assert data['incomplete'] is None
+    assert data['next_cursor'] is None
+
+
+def test_cursor_pagination_descending(counties):
+    widget = Selectize(pagination='cursor')
+    queryset = counties.order_by('-name', 'state__code')
+    assert fetch_all_options(widget, queryset) == [county.pk for county in queryset]
+
+
+def test_cursor_ordering(counties):
+    widget = Selectize(pagination='cursor')
+    assert widget.get_cursor_ordering(County.objects.all()) == [
+        ('state__name', False), ('name', False), ('pk', False),
+    ]
+    assert widget.get_cursor_ordering(County.objects.order_by('-name', 'id')) == [
+        ('name', True), ('id', False),
+    ]
+    assert widget.get_cursor_ordering(County.objects.order_by('state_id')) == [
+        ('state_id', False), ('pk', False),
+    ]
+    assert widget.get_cursor_ordering(County.objects.order_by('?')) is None
+
+
+def test_invalid_cursor(counties):
+    response = get_response(Selectize(pagination='cursor'), counties, cursor='garbage')
+    assert response.status_code == 400
+
+
+def test_offset_pagination(counties):
+    widget = Selectize(search_lookup='name__icontains')
+    data = fetch_options(widget, counties, offset=5)
+    assert len(data['options']) == 5
+    assert 'next_cursor' not in data
+    assert data['incomplete'] is True
+
+
+def count_queries(context):
+    return sum('COUNT(' in query['sql'] for query in context.captured_queries)
+
+
+@pytest.mark.parametrize('count_strategy', ['exact', 'cached', 'probe', 'disabled'])
+def test_count_strategy(counties, count_strategy):
+    caches['default'].clear()
+    widget = Selectize(count_strategy=count_strategy)
+    with CaptureQueriesContext(connection) as context:
+        data = fetch_options(widget, counties)
+    assert len(data['options']) == 5
+    if count_strategy in ['exact', 'cached']:
+        assert count_queries(context) == 1
+        assert data['total_count'] == 21
+        assert data['incomplete'] is True
+    else:
+        assert count_queries(context) == 0
+        assert data['total_count'] is None
+        assert data['incomplete'] is (True if count_strategy == 'probe' else None)
+    with CaptureQueriesContext(connection) as context:
+        data = fetch_options(widget, counties, offset=20)
+    assert len(data['options']) == 1
+    assert count_queries(context) == (1 if count_strategy == 'exact' else 0)
+    assert data['incomplete'] is (None if count_strategy == 'disabled' else False)
+
+
+@pytest.mark.parametrize('count_strategy', ['exact', 'cached', 'probe', 'disabled'])
+def test_render_incomplete(counties, count_strategy):
+    caches['default'].clear()
+    widget = Selectize(count_strategy=count_strategy)
+    widget.max_prefetch_choices = 5
+    field = models.ModelChoiceField(queryset=counties, widget=widget)
+    assert 'incomplete' in field.widget.render('county', None)
+    field.widget.max_prefetch_choices = 25
+    if count_strategy == 'disabled':
+        assert 'incomplete' in field.widget.render('county', None)
+    else:
+        assert 'incomplete' not in field.widget.render('county', None)
+
+
+@pytest.mark.parametrize('projection', [
+    {'label_fields': ['name', 'state__code'], 'label_format': "{0} ({1})"},
+    {'label_fields': ['name', 'state__code'], 'label_format': "{name} ({state__code})"},
+    {'label_expression': Concat('name', Value(" ("), 'state__code', Value(")"))},
+])
+def test_projected_options(counties, projection):
+    expected = fetch_options(Selectize(group_field_name='state'), counties)
+    widget = Selectize(group_field_name='state', group_label_field='state__name', count_strategy='probe', **projection)
+    with CaptureQueriesContext(connection) as context:
+        data = fetch_options(widget, counties)
+    assert len(context.captured_queries) == 1
+    assert data['options'] == expected['options']
+
+
+def test_projected_options_with_cursor(counties):
+    widget = Selectize(label_fields='name', pagination='cursor')
+    assert fetch_all_options(widget, counties) == [county.pk for county in counties]
+
+
+def test_projected_options_require_group_label(counties):
+    widget = Selectize(label_fields='name', group_field_name='state')
+    with pytest.raises(ImproperlyConfigured):
+        get_response(widget, counties)
+
+
+def test_group_by_related_path(counties):
+    widget = Selectize(group_field_name='state__name', count_strategy='disabled')
+    assert str(widget.select_group_related(counties).query) == str(counties.select_related('state').query)
+    with CaptureQueriesContext(connection) as context:
+        data = fetch_options(widget, counties.order_by('state__name', 'name'))
+    assert len(context.captured_queries) == 1
+    assert [option['optgroup'] for option in data['options']] == ["Xanadu A"] * 5
+
+
+@pytest.mark.parametrize('widget', [
+    SelectizeMultiple(max_items=20),
+    SelectizeMultiple(max_items=20, group_field_name='state'),
+    DualSelector(),
+    DualSortableSelector(),
+])
+def test_render_selected_values(counties, widget):
+    widget.max_prefetch_choices = 5
+    queryset = counties.select_related('state')
+    field = models.ModelMultipleChoiceField(queryset=queryset, widget=widget)
+    num_queries = []
+    for selected in [queryset[10:12], queryset[10:20]]:
+        values = [county.pk for county in reversed(selected)]
+        with CaptureQueriesContext(connection) as context:
+            html = field.widget.render('counties', values)
+        num_queries.append(len(context.captured_queries))
+        for county in selected:
+            assert f'value="{county.pk}" selected' in html
+    assert num_queries[0] == num_queries[1]
+
+
+@pytest.mark.parametrize('as_list', [False, True])
+def test_batch_pk_lookup(counties, as_list):
+    pks = [county.pk for county in counties[::5]]
+    params = {'pk': pks} if as_list else {'pk': ','.join(str(pk) for pk in pks)}
+    with CaptureQueriesContext(connection) as context:
+        data = fetch_options(Selectize(count_strategy='disabled'), counties.select_related('state'), **params)
+    assert len(context.captured_queries) == 1
+    assert sorted(option['id'] for option in data['options']) == pks
+
+
+def test_invalid_pk_lookup(counties):
+    response = get_response(Selectize(), counties, pk='garbage')
+    assert response.status_code == 400
+
+
+def test_too_many_pks_lookup(counties):
+    pks = [county.pk for county in counties[:6]]
+    response = get_response(Selectize(), counties, pk=pks)
+    assert response.status_code == 400
+    response = get_response(Selectize(), counties, pk=pks[:5])
+    assert response.status_code == 200
+
+
+def test_fetch_many_options(counties):
+    form_class = type('CountyForm', (Form,), {
+        'county': models.ModelChoiceField(queryset=counties, widget=Selectize(search_lookup='name__icontains')),
+        'counties': models.ModelMultipleChoiceField(queryset=counties, widget=DualSelector()),
+    })
+    view = FormView.as_view(form_class=form_class, template_name='testapp/native-form.html')
+    params = {'field': ['county', 'counties'], 'county:search': "County 3", 'counties:offset': 20}
+    response = view(RequestFactory().get('/', params, HTTP_ACCEPT='application/json'))
+    assert response.status_code == 200
+    data = json.loads(response.content)
+    assert set(data.keys()) == {'county', 'counties'}
+    assert data['county']['count'] == 3
+    assert data['county']['incomplete'] is None
+    assert data['counties']['count'] == 1
+    assert data['counties']['total_count'] == 21
+    assert data['counties']['incomplete'] is False
+    params = {'field': ['county', 'unknown']}
+    response = view(RequestFactory().get('/', params, HTTP_ACCEPT='application/json'))
+    assert response.status_code == 400
+
+
+class NumberSource(ChoiceSource):
+    """
+    Computes its choices on demand rather than materializing them.
+    """
+    def __init__(self, size):
+        self.size = size
+
+    def get_choices(self):
+        raise AssertionError("NumberSource shall not be materialized")
+
+    def count(self):
+        return self.size
+
+    def slice(self, offset, limit):
+        return [(n, f"Number {n}") for n in range(offset, min(offset + limit, self.size))]
+
+    def search(self, term):
+        return ChoiceSource([(n, f"Number {n}") for n in range(self.size) if term in str(n)])
+
+    def lookup(self, values):
+        return [(int(v), f"Number {v}") for v in values if 0 <= int(v) < self.size]
+
+
+def fetch_source_options(widget, choices, **params):
+    widget.max_prefetch_choices = 5
+    form_class = type('NumberForm', (Form,), {'number': ChoiceField(choices=choices, widget=widget)})
+    view = FormView.as_view(form_class=form_class, template_name='testapp/native-form.html')
+    request = RequestFactory().get('/', {'field': 'number', **params}, HTTP_ACCEPT='application/json')
+    response = view(request)
+    assert response.status_code == 200
+    return json.loads(response.content)
+
+
+@pytest.mark.parametrize('choices', [
+    NumberSource(1000),
+    ChoiceSource(lambda: [(n, f"Number {n}") for n in range(1000)]),
+])
+def test_choice_source(choices):
+    data = fetch_source_options(Selectize(), choices, offset=995)
+    assert [option['label'] for option in data['options']] == [f"Number {n}" for n in range(995, 1000)]
+    assert data['total_count'] == 1000
+    assert data['incomplete'] is False
+    data = fetch_source_options(Selectize(), choices, search="99")
+    assert data['total_count'] == 19
+    assert data['incomplete'] is True
+    data = fetch_source_options(Selectize(), choices, pk='7,700')
+    assert [option['id'] for option in data['options']] == [7, 700]
+
+
+def test_choice_source_evaluated_once():
+    calls = []
+
+    def get_numbers():
+        calls.append(None)
+        return [(n, f"Number {n}") for n in range(1000)]
+
+    data = fetch_source_options(Selectize(), ChoiceSource(get_numbers), pk='7,700')
+    assert len(data['options']) == 2
+    data = fetch_source_options(Selectize(), ChoiceSource(get_numbers), offset=10)
+    assert data['total_count'] == 1000
+    assert len(calls) == 2
+    widget = Selectize()
+    widget.max_prefetch_choices = 5
+    html = fields.ChoiceField(choices=ChoiceSource(get_numbers), widget=widget).widget.render('number', '700')
+    assert 'incomplete' in html
+    assert 'value="700" selected' in html
+    assert len(calls) == 3
+
+
+def test_validate_choice_source():
+    field = fields.ChoiceField(choices=NumberSource(1000), widget=Selectize())
+    assert field.clean('700') == '700'
+    with pytest.raises(ValidationError):
+        field.clean('1000')
+    field = fields.MultipleChoiceField(choices=NumberSource(1000), widget=SelectizeMultiple())
+    assert field.clean(['3', '700']) == ['3', '700']
+    with pytest.raises(ValidationError):
+        field.clean(['3', '1000'])
+    with pytest.raises(ValidationError):
+        field.clean([])
+
+
+def test_filter_choice_source():
+    choices = ChoiceSource(lambda: [(n, f"Number {n}") for n in range(1000)])
+    data = fetch_source_options(Selectize(filter_by={'state': 'state__id'}), choices, **{'filter-state': '1'})
+    assert data['filters'] == {'state': ['1']}
+    assert data['total_count'] == 1000
+    assert [option['id'] for option in data['options']] == [0, 1, 2, 3, 4]
+
+
+def test_render_choice_source():
+    widget = DualSortableSelector()
+    widget.max_prefetch_choices = 5
+    field = MultipleChoiceField(choices=NumberSource(1000), widget=widget)
+    html = field.widget.render('numbers', ['700', '3'])
+    assert 'incomplete' in html
+    assert html.index('value="700" selected') < html.index('value="3" selected') < html.index('value="0"')
+    assert 'value="5"' not in html
@@ -1,16 +1,24 @@
 import json
+from copy import copy
+from unittest import mock
 
 import pytest
 from bs4 import BeautifulSoup, Tag
 
+from django.core.cache import caches
 from django.core.exceptions import NON_FIELD_ERRORS
+from django.db import connection
 from django.forms import fields, forms
 from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import translation
 
-from formset.collection import COLLECTION_ERRORS, FormCollection
-from formset.views import EditCollectionView, FormCollectionView
+from formset.collection import COLLECTION_ERRORS, FormCollection, LazyModelsList
+from formset.utils import MARKED_FOR_REMOVAL
+from formset.views import BulkEditCollectionView, EditCollectionView, FormCollectionView
 
-from testapp.forms.company import CompanyCollection
+from testapp.forms.company import CompaniesCollection, CompanyCollection
+from testapp.forms.contact import ContactCollectionList
 from testapp.models.company import Company, Department, Team
 
 
@@ -313,3 +321,406 @@ def test_check_missing_collection_data(contact_collection_view):
         'person': {NON_FIELD_ERRORS: ['Form data is missing.']},
         'numbers': {NON_FIELD_ERRORS: ['Form data is missing.']}
     }
+
+
+def test_get_field():
+    person_form = ContactCollection.declared_holders['person']
+    number_form = ContactCollection.declared_holders['numbers'].declared_holders['number']
+    assert ContactCollection.get_field('person.full_name') is person_form.fields['full_name']
+    assert ContactCollection.get_field('numbers.0.number.phone_number') is number_form.fields['phone_number']
+    assert ContactCollection.get_field('numbers.12.number.phone_number') is number_form.fields['phone_number']
+    assert ContactCollection().get_field('person.full_name') is person_form.fields['full_name']
+    with pytest.raises(KeyError):
+        ContactCollection.get_field('numbers.number.phone_number')
+    with pytest.raises(KeyError):
+        ContactCollection.get_field('person.unknown')
+
+
+def test_replicas_share_fields():
+    declared_form = ContactCollection.declared_holders['numbers'].declared_holders['number']
+    sibling, template = ContactCollection.declared_holders['numbers'].replicate()
+    assert template.is_template
+    assert sibling.fields['phone_number'] is declared_form.fields['phone_number']
+    assert template.fields['phone_number'] is declared_form.fields['phone_number']
+    sibling.fields['extension'] = fields.CharField(required=False)
+    assert list(sibling.fields) == ['phone_number', 'extension']
+    assert sibling.fields['phone_number'] is not declared_form.fields['phone_number']
+    assert list(template.fields) == list(declared_form.fields) == ['phone_number']
+    template.fields.detach()['phone_number'].required = False
+    assert declared_form.fields['phone_number'].required is True
+
+
+def test_template_cache():
+    def get_template(collection):
+        return [holder for holder in collection if getattr(holder, 'is_template', False)][0]
+
+    collection_class = type('CachedNumberCollection', (PhoneNumberCollection,), {'template_cache': 'default'})
+    cache = caches['default']
+    cache.clear()
+    html = collection_class().render()
+    template = get_template(collection_class())
+    assert cache.get(template.key) == template.holder.render()
+    assert collection_class().render() == html
+    cache.set(template.key, '<p>cached template</p>')
+    assert '<p>cached template</p>' in collection_class().render()
+    with translation.override('de'):
+        assert get_template(collection_class()).key != template.key
+    assert get_template(PhoneNumberCollection()).render() == template.holder.render()
+
+
+def test_template_cache_key():
+    from formset.renderers.default import FormRenderer
+
+    def get_key(renderer):
+        collection = PhoneNumberCollection(renderer=renderer)
+        holder = collection.declared_holders['number'].replicate(prefix='${siblingId}.number', renderer=renderer)
+        return collection.get_template_cache_key('number', holder)
+
+    renderer = FormRenderer(form_css_classes='a b c', field_css_classes={'*': 'x y', 'phone_number': 'z'})
+    renderer.engine  # caches the template engine on the renderer
+    key = get_key(renderer)
+    assert key == get_key(FormRenderer(form_css_classes='c a b', field_css_classes={'phone_number': 'z', '*': 'y x'}))
+    assert key != get_key(FormRenderer(form_css_classes='a b', field_css_classes={'*': 'x y', 'phone_number': 'z'}))
+    assert key != get_key(FormRenderer(form_css_classes='a b c', field_css_classes={'*': 'x y'}, exempt_feedback=True))
+
+
+def test_template_cache_nested():
+    class CachedContactCollectionList(FormCollection):
+        min_siblings = 2
+        person = PersonForm()
+        numbers = type('CachedNumberCollection', (PhoneNumberCollection,), {'template_cache': 'default'})()
+
+    class ContactCollectionList(FormCollection):
+        min_siblings = 2
+        person = PersonForm()
+        numbers = PhoneNumberCollection()
+
+    cache = caches['default']
+    cache.clear()
+    with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+        html = CachedContactCollectionList().render()
+        assert CachedContactCollectionList().render() == html
+    # one entry shared by the siblings and one for the template of the outer collection
+    assert cache_set.call_count == 2
+    assert html == ContactCollectionList().render()
+    keys = [
+        holder.key for numbers in CachedContactCollectionList() if isinstance(numbers, FormCollection)
+        and not getattr(numbers, 'is_template', False) for holder in numbers if getattr(holder, 'is_template', False)
+    ]
+    assert len(keys) == 2 and keys[0] == keys[1]
+    soup = BeautifulSoup(html, 'html.parser')
+    templates = soup.find_all('template', class_='empty-collection')
+    assert len(templates) == 4
+    assert templates[0].find('input', {'name': 'phone_number'})['id'] == 'id_0.numbers.${siblingId}.number.phone_number'
+    assert templates[1].find('input', {'name': 'phone_number'})['id'] == 'id_1.numbers.${siblingId}.number.phone_number'
+
+
+def test_share_templates():
+    initial = [
+        {'person': {'full_name': f"Person {n}"}, 'numbers': [{'number': {'phone_number': '+1'}}]} for n in range(3)
+    ]
+    plain_soup = BeautifulSoup(ContactCollectionList(initial=initial).render(), 'html.parser')
+    collection_class = type('SharedContactCollectionList', (ContactCollectionList,), {'share_templates': True})
+    shared_soup = BeautifulSoup(collection_class(initial=initial).render(), 'html.parser')
+    shared_templates = shared_soup.find_all('template', class_='shared-collection')
+    assert len(shared_templates) == 1
+    assert shared_templates[0]['id'] == 'shared-template-*.numbers'
+    assert shared_templates[0]['prefix'] == '${parent_0}.numbers'
+    pattern = shared_templates[0].find('template', class_='empty-collection').decode_contents()
+    for position in range(4):
+        prefix = f'{position}.numbers'
+        reference = shared_soup.find('template', attrs={'prefix': prefix})
+        assert reference['shared-template'] == 'shared-template-*.numbers'
+        assert reference.decode_contents() == ''
+        assert reference.find_next_sibling().name == 'button'
+        template = plain_soup.find('template', attrs={'prefix': prefix})
+        assert template.decode_contents() == pattern.replace('${parent_0}', str(position))
+    assert len(str(shared_soup)) < len(str(plain_soup))
+
+
+def test_lazy_siblings():
+    initial = [
+        {'person': {'full_name': f"Person {n}"}, 'numbers': [{'number': {'phone_number': '+1'}}]} for n in range(3)
+    ]
+    numbers = copy(ContactCollectionList.declared_holders['numbers'])
+    numbers.lazy_siblings = True
+    collection_class = type('LazyContactCollectionList', (ContactCollectionList,), {'numbers': numbers})
+    soup = BeautifulSoup(collection_class(initial=initial).render(), 'html.parser')
+    references = soup.find_all('template', attrs={'lazy-sibling': True})
+    assert [reference['prefix'] for reference in references] == [
+        '0.numbers', '1.numbers', '2.numbers', '3.numbers', '${siblingId}.numbers',
+    ]
+    assert all(reference.decode_contents() == '' for reference in references)
+    assert references[0]['max-siblings'] == '3'
+    assert references[0].find_next_sibling().name == 'button'
+
+    view = FormCollectionView.as_view(collection_class=collection_class)
+    response = view(RequestFactory().get('/', {'sibling': '1.numbers'}))
+    assert response.status_code == 200
+    template = BeautifulSoup(response.content, 'html.parser').find('template', class_='empty-collection')
+    plain_soup = BeautifulSoup(ContactCollectionList(initial=initial).render(), 'html.parser')
+    assert template.decode_contents() == plain_soup.find('template', attrs={'prefix': '1.numbers'}).decode_contents()
+    response = view(RequestFactory().get('/', {'sibling': '1.numbers', 'position': '2'}))
+    sibling = BeautifulSoup(response.content, 'html.parser').find('django-form-collection')
+    assert sibling['sibling-position'] == '2'
+    assert sibling.find('input')['id'] == 'id_1.numbers.2.number.phone_number'
+    assert sibling.find('form')['id'] == 'id_1.numbers.2.number'
+    response = view(RequestFactory().get('/', {'sibling': '1.person'}))
+    assert response.status_code == 400
+    response = view(RequestFactory().get('/', {'sibling': '1.numbers', 'position': 'x'}))
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_siblings_window():
+    Company.objects.bulk_create(Company(name=f"Company {n:02}", created_by='window') for n in range(25))
+    queryset = Company.objects.filter(created_by='window').order_by('name')
+    collection_class = type('WindowedCompaniesCollection', (CompaniesCollection,), {
+        'siblings_window': 10,
+        'help_text': "Companies of this user",
+    })
+    initial = LazyModelsList(collection_class(), queryset)
+    with CaptureQueriesContext(connection) as context:
+        soup = BeautifulSoup(collection_class(initial=initial).render(), 'html.parser')
+    assert len(context.captured_queries) == 3  # count, window of companies and their departments
+    siblings = soup.find(class_='collection-siblings').find_all('django-form-collection', recursive=False)
+    assert [sibling['sibling-position'] for sibling in siblings] == [str(n) for n in range(10)]
+    assert soup.find('input', attrs={'name': 'name', 'form': 'id_9.company'})['value'] == "Company 09"
+    assert soup.find('button', class_='load-siblings')['offset'] == '10'
+    assert soup.find('template', attrs={'prefix': '0'}) is not None
+
+    view = BulkEditCollectionView.as_view(collection_class=collection_class, queryset=queryset)
+    response = view(RequestFactory().get('/', {'siblings_offset': '10'}))
+    assert response.status_code == 200
+    soup = BeautifulSoup(response.content, 'html.parser')
+    # the response contains just the siblings of that window, which the client appends to those loaded before
+    siblings = soup.find_all('django-form-collection', recursive=False)
+    assert [sibling['sibling-position'] for sibling in siblings] == [str(n) for n in range(10, 20)]
+    assert soup.find('button', class_='load-siblings', recursive=False)['offset'] == '20'
+    response = view(RequestFactory().get('/', {'siblings_offset': '20'}))
+    assert response.status_code == 200
+    soup = BeautifulSoup(response.content, 'html.parser')
+    siblings = soup.find_all('django-form-collection', recursive=False)
+    assert [sibling['sibling-position'] for sibling in siblings] == [str(n) for n in range(20, 25)]
+    assert soup.find('input', attrs={'name': 'name', 'form': 'id_24.company'})['value'] == "Company 24"
+    assert soup.find('button', class_='load-siblings') is None
+    assert soup.find('template', attrs={'prefix': '0'}) is None
+    assert soup.find(class_='collection-siblings', recursive=False) is None
+    assert soup.find(class_='dj-help-text', recursive=False) is None
+    assert "Companies of this user" not in response.content.decode()
+    assert soup.find('legend', recursive=False) is None
+    assert soup.find('button', class_='add-collection', recursive=False) is None
+    response = view(RequestFactory().get('/', {'siblings_offset': 'x'}))
+    assert response.status_code == 400
+
+    initial = LazyModelsList(collection_class(), Company.objects.filter(created_by='window').order_by())
+    assert initial.queryset.ordered
+    names = [company['company']['name'] for offset in range(0, 25, 10) for company in initial[offset:offset + 10]]
+    assert sorted(names) == [f"Company {n:02}" for n in range(25)]
+
+
+@pytest.mark.django_db
+def test_submit_loaded_window():
+    companies = Company.objects.bulk_create(Company(name=f"Company {n:02}", created_by='window') for n in range(25))
+    queryset = Company.objects.filter(created_by='window').order_by('name')
+    collection_class = type('WindowedCompaniesCollection', (CompaniesCollection,), {'siblings_window': 10})
+    view = BulkEditCollectionView.as_view(collection_class=collection_class, queryset=queryset, success_url='/success')
+    formset_data = [
+        {'company': {'id': company.id, 'name': company.name, 'created_by': 'window'}, 'departments': []}
+        for company in companies[:10]
+    ]
+    formset_data[3]['company']['name'] = "Renamed"
+    body = {'formset_data': formset_data, 'siblings_offset': 10}
+    request = RequestFactory().post('/', body, content_type='application/json')
+    response = view(request)
+    assert response.status_code == 200
+    assert Company.objects.get(id=companies[3].id).name == "Renamed"
+    assert queryset.count() == 25
+
+    # the siblings of windows not loaded by the client count as well
+    collection_class.max_siblings = 20
+    request = RequestFactory().post('/', body, content_type='application/json')
+    response = view(request)
+    assert response.status_code == 422
+    request = RequestFactory().post('/', {'formset_data': formset_data}, content_type='application/json')
+    response = view(request)
+    assert response.status_code == 200
+
+
+def test_render_iter():
+    initial = [{'person': {'full_name': f"Person {n}"}, 'numbers': [{'number': {'phone_number': '+1234567'}}]}
+               for n in range(3)]
+    collection = ContactCollectionList(initial=initial)
+    parts = list(collection.render_iter())
+    assert len(parts) == 6  # head, three siblings, one extra sibling and tail
+    assert ''.join(parts) == collection.render()
+
+
+def test_render_iter_nested():
+    initial = {'person': {'full_name': "Person"}, 'numbers': [{'number': {'phone_number': '+1234567'}}] * 3}
+    collection = ContactCollection(initial=initial)
+    parts = list(collection.render_iter())
+    # head, person, opening of numbers, their head, three numbers, one extra number with their tail,
+    # closing of numbers and tail
+    assert len(parts) == 10
+    assert ''.join(parts) == collection.render()
+    collection_class = type('SharedContactsCollection', (FormCollection,), {
+        'contacts': ContactCollectionList(),
+        'share_templates': True,
+    })
+    initial = {'contacts': [{'person': {'full_name': f"Person {n}"}, 'numbers': initial['numbers']} for n in range(3)]}
+    collection = collection_class(initial=initial)
+    parts = list(collection.render_iter())
+    assert 'class="shared-collection"' in parts[-1]
+    assert ''.join(parts) == collection.render()
+
+
+@pytest.mark.django_db
+def test_streaming_response():
+    view = FormCollectionView.as_view(
+        collection_class=ContactCollectionList,
+        template_name='testapp/form-collection.html',
+        streaming=True,
+    )
+    response = view(RequestFactory().get('/'))
+    assert response.streaming
+    content = b''.join(response.streaming_content).decode()
+    soup = BeautifulSoup(content, 'html.parser')
+    assert soup.find('django-formset').find('django-form-collection') is not None
+    assert 'form-collection-' not in content
+
+
+@pytest.mark.django_db
+def test_bulk_persistence():
+    companies = Company.objects.bulk_create(Company(name=f"Company {n}") for n in range(3))
+    collection_class = type('BulkCompaniesCollection', (CompaniesCollection,), {'bulk_persistence': True})
+    view = BulkEditCollectionView.as_view(
+        collection_class=collection_class,
+        queryset=Company.objects.all(),
+        ordering='name',
+        success_url='/success',
+    )
+    formset_data = [
+        {'company': {'id': companies[0].id, 'name': "Company 0", 'created_by': ''}, 'departments': []},
+        {'company': {'id': companies[1].id, 'name': "Renamed", 'created_by': ''}, 'departments': []},
+        {'company': {'id': companies[2].id, 'name': "Company 2", 'created_by': '', MARKED_FOR_REMOVAL: True},
+         'departments': []},
+        {'company': {'name': "Company 3", 'created_by': ''}, 'departments': [{
+            'department': {'name': "Sales"},
+            'teams': [],
+        }]},
+    ]
+    request = RequestFactory().post('/', {'formset_data': formset_data}, content_type='application/json')
+    with CaptureQueriesContext(connection) as context:
+        response = view(request)
+    assert response.status_code == 200
+    queries = [query['sql'] for query in context.captured_queries]
+    assert len([sql for sql in queries if sql.startswith('UPDATE "testapp_company"')]) == 1
+    assert len([sql for sql in queries if sql.startswith('INSERT INTO "testapp_company"')]) == 1
+    assert list(Company.objects.order_by('name').values_list('name', flat=True)) == [
+        "Company 0", "Company 3", "Renamed",
+    ]
+    assert Department.objects.get(name="Sales").company.name == "Company 3"
+
+    # the offending sibling receives the integrity error
+    formset_data = [
+        {'company': {'id': companies[0].id, 'name': "Company 0", 'created_by': ''}, 'departments': []},
+        {'company': {'name': "Renamed", 'created_by': ''}, 'departments': []},
+    ]
+    request = RequestFactory().post('/', {'formset_data': formset_data}, content_type='application/json')
+    response = view(request)
+    assert response.status_code == 422
+    errors = json.loads(response.content)
+    assert errors[0]['company'] == {}
+    assert errors[1]['company']['__all__']
+
+
+@pytest.mark.django_db
+def test_bulk_persistence_reordered():
+    alpha = Company.objects.create(name="Alpha", created_by='x')
+    beta = Company.objects.create(name="Beta", created_by='y')
+    collection_class = type('BulkCompaniesCollection', (CompaniesCollection,), {'bulk_persistence': True})
+    view = BulkEditCollectionView.as_view(
+        collection_class=collection_class,
+        queryset=Company.objects.all(),
+        ordering='name',
+        success_url='/success',
+    )
+    # the siblings are submitted in reverse order, each one renamed to the name of the other one
+    formset_data = [
+        {'company': {'id': beta.id, 'name': "Alpha", 'created_by': ''}, 'departments': []},
+        {'company': {'id': alpha.id, 'name': "Beta", 'created_by': ''}, 'departments': []},
+    ]
+    request = RequestFactory().post('/', {'formset_data': formset_data}, content_type='application/json')
+    response = view(request)
+    assert response.status_code == 200
+    assert dict(Company.objects.values_list('id', 'name')) == {alpha.id: "Beta", beta.id: "Alpha"}
+
+
+@pytest.mark.django_db
+def test_persistence_plan():
+    collection_class = type('BulkCompaniesCollection', (CompaniesCollection,), {'bulk_persistence': True})
+    view = BulkEditCollectionView.as_view(
+        collection_class=collection_class,
+        queryset=Company.objects.all(),
+        success_url='/success',
+    )
+    formset_data = [{
+        'company': {'name': f"Company {c}", 'created_by': ''},
+        'departments': [{
+            'department': {'name': f"Department {c}.{d}"},
+            'teams': [{'team': {'name': f"Team {c}.{d}.{t}"}} for t in range(3)],
+        } for d in range(3)],
+    } for c in range(3)]
+    request = RequestFactory().post('/', {'formset_data': formset_data}, content_type='application/json')
+    with CaptureQueriesContext(connection) as context:
+        response = view(request)
+    assert response.status_code == 200
+    inserts = [query['sql'] for query in context.captured_queries if query['sql'].startswith('INSERT')]
+    assert len(inserts) == 3  # one for each level
+    assert Company.objects.count() == 3
+    assert Department.objects.count() == 9
+    assert Team.objects.count() == 27
+    team = Team.objects.get(name="Team 2.1.0")
+    assert team.department.name == "Department 2.1"
+    assert team.department.company.name == "Company 2"
+
+
+@pytest.mark.django_db
+def test_prefetch_initial():
+    for c in range(5):
+        company = Company.objects.create(name=f"Company {c}")
+        for d in range(3):
+            department = Department.objects.create(name=f"Department {c}.{d}", company=company)
+            Team.objects.bulk_create(Team(name=f"Team {c}.{d}.{t}", department=department) for t in range(3))
+    assert CompaniesCollection.prefetch_lookups == ['departments', 'departments__teams']
+    with CaptureQueriesContext(connection) as context:
+        initial = CompaniesCollection().models_to_list(Company.objects.order_by('name'))
+    assert len(context.captured_queries) == 3  # one for each level
+    assert initial[4]['departments'][2]['teams'][1]['team']['name'] == "Team 4.2.1"
+
+    view = CompanyCollectionView(object=company, initial={})
+    with CaptureQueriesContext(connection) as context:
+        initial = view.get_initial()
+    assert len(context.captured_queries) == 2
+    assert [department['department']['name'] for department in initial['departments']] == [
+        "Department 4.0", "Department 4.1", "Department 4.2",
+    ]
+
+
+@pytest.mark.django_db
+def test_retrieve_instances():
+    companies = Company.objects.bulk_create(Company(name=f"Company {n:02}") for n in range(20))
+    formset_data = [
+        {'company': {'id': company.id, 'name': company.name, 'created_by': ''}, 'departments': []}
+        for company in companies
+    ]
+    formset_data.append({'company': {'id': '', 'name': "New Company", 'created_by': ''}, 'departments': []})
+    collection = CompaniesCollection(data=formset_data)
+    with CaptureQueriesContext(connection) as context:
+        assert collection.is_valid()
+    assert len(context.captured_queries) == 1
+    instances = [valid_holders['company'].instance for valid_holders in collection.valid_holders]
+    assert instances[:20] == companies
+    assert instances[20].pk is None
+    assert instances[20].name == "New Company"
@@ -3,15 +3,23 @@ import pytest
 import json
 from bs4 import BeautifulSoup
 from copy import copy
-from django.forms.fields import CharField
+from django.forms.fields import BooleanField, CharField, FileField
 from django.forms.forms import Form
 from django.test import RequestFactory
+from django.utils import translation
 
+from formset.boundfield import CheckboxInputMixin, clear_static_metadata
 from formset.collection import COLLECTION_ERRORS, FormCollection
+from formset.fields import FileFieldMixin
+from formset.renderers import ClassList
 from formset.renderers.bootstrap import FormRenderer as BootstrapFormRenderer
+from formset.renderers.default import ContextOverlay
+from formset.templatetags.formsetify import _formsetify
+from formset.utils import FormMixin
 from formset.views import FormView, FormCollectionView
+from formset.widgets import UploadedFileInput
 
-from testapp.forms.contact import SimpleContactCollection, PhoneNumberCollection
+from testapp.forms.contact import SimpleContactCollection, PhoneNumberCollection, PhoneNumberForm
 from testapp.forms.person import PersonForm, sample_person_data
 
 
@@ -328,3 +336,106 @@ def test_collection_post(counter, formset_data):
     if counter == 6:
         assert response.status_code == 200
         assert body['success_url'] == '/success'
+
+
+def test_renderers_share_template_engine():
+    renderer = BootstrapFormRenderer()
+    assert renderer.engine is BootstrapFormRenderer(field_css_classes='mb-3').engine
+    loader = renderer.engine.engine.template_loaders[0]
+    template = loader.get_template('formset/bootstrap/form.html')
+    assert loader.get_template('formset/bootstrap/form.html') is template
+
+
+def test_context_overlay():
+    option = {'value': 1, 'attrs': {'class': ClassList('a')}}
+    widget = {'attrs': {'class': ClassList('b')}, 'optgroups': [(None, [option], 0)]}
+    context = {'widget': widget, 'label': "L"}
+    overlay = ContextOverlay(context)
+    overlay['widget']['attrs']['class'].add('c')
+    for _, options, _ in overlay['widget']['optgroups']:
+        for opt in options:
+            opt['attrs']['class'] = ClassList('d')
+    overlay.pop('label')
+    result = overlay.materialize()
+    assert type(result) is dict and type(result['widget']['optgroups'][0]) is tuple
+    assert result['widget']['attrs']['class'] == {'b', 'c'}
+    assert result['widget']['optgroups'][0][1][0] == {'value': 1, 'attrs': {'class': {'d'}}}
+    assert 'label' not in result
+    assert widget == {'attrs': {'class': {'b'}}, 'optgroups': [(None, [option], 0)]}
+    assert context == {'widget': widget, 'label': "L"}
+    assert option == {'value': 1, 'attrs': {'class': {'a'}}}
+    untouched = ContextOverlay(context)
+    untouched['label']
+    assert untouched.materialize()['widget'] is context['widget']
+
+
+def test_context_overlay_indices():
+    overlay = ContextOverlay({'items': [{'a': 1}, {'a': 2}], 'pair': ({'b': 1}, {'b': 2}), 'empty': [], 'none': ()})
+    overlay['items'][-1]['a'] = 3
+    overlay['pair'][-2]['b'] = 4
+    for key in ('items', 'pair', 'empty', 'none'):
+        with pytest.raises(IndexError):
+            overlay[key][2]
+        with pytest.raises(IndexError):
+            overlay[key][-3]
+    result = overlay.materialize()
+    assert result['items'] == [{'a': 1}, {'a': 3}]
+    assert result['pair'] == ({'b': 4}, {'b': 2})
+
+
+class ConsentForm(Form):
+    consent = BooleanField(label="I agree")
+    attachment = FileField(required=False, widget=UploadedFileInput)
+
+
+def test_render_creates_no_classes():
+    def count_classes():
+        return sum(len(mixin.__subclasses__()) for mixin in (FormMixin, CheckboxInputMixin, FileFieldMixin))
+
+    def render_widgets():
+        form = _formsetify(ConsentForm())
+        return form['consent'].as_widget(), form['attachment']
+
+    render_widgets()
+    num_classes = count_classes()
+    for _ in range(10000):
+        render_widgets()
+    assert count_classes() == num_classes
+
+
+def test_client_messages_computed_once(monkeypatch):
+    from formset.boundfield import BoundField
+
+    calls = []
+    get_client_messages = BoundField._get_client_messages
+
+    def counting_get_client_messages(bound_field):
+        calls.append(bound_field.name)
+        return get_client_messages(bound_field)
+
+    monkeypatch.setattr(BoundField, '_get_client_messages', counting_get_client_messages)
+    clear_static_metadata()
+    collection_class = type('NumberCollection', (PhoneNumberCollection,), {'number': PhoneNumberForm()})
+    collection = collection_class(initial=[{'number': {'phone_number': '+1234'}}] * 5)
+    collection.render()
+    collection.render()
+    assert calls.count('phone_number') == 1
+    form = _formsetify(AddressForm())
+    with translation.override('de'):
+        messages = form['recipient'].errors.client_messages
+        assert form['recipient'].errors.client_messages is messages
+        value_missing = str(messages['value_missing'])
+    assert calls.count('recipient') == 1
+    with translation.override('en'):
+        assert str(form['recipient'].errors.client_messages['value_missing']) != value_missing
+    assert calls.count('recipient') == 2
+
+
+def test_clear_static_metadata():
+    form = _formsetify(AddressForm())
+    assert 'dj-required' in form['city'].css_classes()
+    field = form.fields['city']
+    field.required = False
+    assert 'dj-required' in form['city'].css_classes()
+    clear_static_metadata(field)
+    assert 'dj-required' not in form['city'].css_classes()